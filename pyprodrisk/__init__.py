@@ -1 +1,3 @@
 from .prodrisk_runner import ProdriskSession
+from .session_pool import ProdriskSessionPool
+from .run_cache import RunCache
@@ -0,0 +1,245 @@
+import os
+import pickle
+import socket
+import tempfile
+import threading
+import time
+import traceback
+import uuid
+
+# Distributed runs through a broker directory shared by all nodes (e.g. on NFS or SMB). Each job is a pickled file
+# that moves between the state directories below. Claiming a job is an atomic rename from pending to running, so
+# only one worker can claim it. Workers touch the running job file while the job runs, and jobs whose heartbeat
+# is older than the timeout are requeued by requeue_stale().
+_STATES = ['pending', 'running', 'done', 'failed']
+
+
+class FileBroker(object):
+
+    def __init__(self, directory):
+        self._directory = os.path.abspath(directory)
+        for state in _STATES + ['results']:
+            os.makedirs(os.path.join(self._directory, state), exist_ok=True)
+
+    @property
+    def directory(self):
+        return self._directory
+
+    def _get_path(self, state, job_id):
+        return os.path.join(self._directory, state, job_id + '.pkl')
+
+    def _write(self, path, value):
+        # Write to a temporary file in the same directory first, so that readers never see partially written files
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def _read(self, path):
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    def submit(self, spec, max_retries=2):
+        """
+            Parameters
+            ----------
+            spec: [dict] model specification from ProdriskSession.get_model_spec
+            max_retries: [integer] number of times a failed or abandoned job is run again
+
+            Returns
+            -------
+            [string] job id
+        """
+        # Job ids start with the submit time, so that listing the pending directory gives the jobs in FIFO order
+        job_id = f'{time.time_ns():020d}_{uuid.uuid4().hex[:12]}'
+        job = {'id': job_id, 'spec': spec, 'attempts': 0, 'max_retries': max_retries, 'errors': []}
+        self._write(self._get_path('pending', job_id), job)
+        return job_id
+
+    def claim(self, worker_id=''):
+        for filename in sorted(os.listdir(os.path.join(self._directory, 'pending'))):
+            if not filename.endswith('.pkl'):
+                continue
+            job_id = filename[:-4]
+            try:
+                os.rename(self._get_path('pending', job_id), self._get_path('running', job_id))
+            except OSError:
+                continue  # Claimed by another worker
+            job = self._read(self._get_path('running', job_id))
+            job['attempts'] += 1
+            job['worker'] = worker_id
+            self._write(self._get_path('running', job_id), job)
+            return job
+        return None
+
+    def heartbeat(self, job_id):
+        try:
+            os.utime(self._get_path('running', job_id))
+        except OSError:
+            pass
+
+    def complete(self, job_id, result):
+        self._write(self._get_path('results', job_id), result)
+        for state in ['running', 'pending', 'failed']:
+            # The job is normally running, but may have been requeued after a missed heartbeat and finished anyway
+            try:
+                os.replace(self._get_path(state, job_id), self._get_path('done', job_id))
+                return
+            except OSError:
+                continue
+
+    def fail(self, job_id, error):
+        # Requeue the job if it has retries left, otherwise move it to failed. Returns False if the job is no longer
+        # running, e.g. because another collector requeued it first
+        running_path = self._get_path('running', job_id)
+        # Move the job out of running first, like claim does, so that only one caller fails it. The private name does
+        # not end with .pkl, so it is not seen by requeue_stale
+        failing_path = f'{running_path}.{uuid.uuid4().hex[:12]}.failing'
+        try:
+            os.rename(running_path, failing_path)
+        except OSError:
+            return False  # Already moved by someone else
+        job = self._read(failing_path)
+        job['errors'].append(error)
+        if job['attempts'] <= job['max_retries']:
+            target_path = self._get_path('pending', job_id)
+        else:
+            target_path = self._get_path('failed', job_id)
+        self._write(target_path, job)
+        os.remove(failing_path)
+        return True
+
+    def requeue_stale(self, timeout):
+        # Fail running jobs without a heartbeat for timeout seconds, e.g. because the node running it went down
+        n_requeued = 0
+        now = time.time()
+        for filename in os.listdir(os.path.join(self._directory, 'running')):
+            if not filename.endswith('.pkl'):
+                continue
+            try:
+                stale = now - os.path.getmtime(os.path.join(self._directory, 'running', filename)) > timeout
+            except OSError:
+                continue
+            if stale and self.fail(filename[:-4], f'No heartbeat for {timeout} s'):
+                n_requeued += 1
+        return n_requeued
+
+    def status(self, job_id):
+        for state in _STATES:
+            if os.path.exists(self._get_path(state, job_id)):
+                return state
+        return None
+
+    def get_errors(self, job_id):
+        state = self.status(job_id)
+        return self._read(self._get_path(state, job_id))['errors'] if state else []
+
+    def get_result(self, job_id):
+        try:
+            return self._read(self._get_path('results', job_id))
+        except OSError:
+            return None
+
+    def collect(self, job_ids, timeout=None, poll_interval=1.0, stale_timeout=None):
+        """
+            Wait for jobs to finish.
+
+            Parameters
+            ----------
+            job_ids: [list] ids returned by submit
+            timeout: [float] seconds to wait, or None to wait until all jobs are done or failed
+            poll_interval: [float] seconds between each check of the broker directory
+            stale_timeout: [float] requeue jobs without a heartbeat for this many seconds while waiting
+
+            Returns
+            -------
+            [dict] result of each finished job by job id, failed jobs and jobs not finished within timeout are left out
+        """
+        start = time.monotonic()
+        remaining = list(job_ids)
+        results = {}
+        while remaining:
+            if stale_timeout is not None:
+                self.requeue_stale(stale_timeout)
+            for job_id in list(remaining):
+                state = self.status(job_id)
+                if state == 'done':
+                    results[job_id] = self.get_result(job_id)
+                    remaining.remove(job_id)
+                elif state == 'failed' or state is None:
+                    remaining.remove(job_id)
+            if remaining:
+                if timeout is not None and time.monotonic() - start > timeout:
+                    break
+                time.sleep(poll_interval)
+        return results
+
+
+def run_worker(broker, session_factory, worker_id='', settings=None, heartbeat_interval=10.0, poll_interval=1.0,
+               max_jobs=None, idle_timeout=None):
+    """
+        Claim and run jobs from the broker until max_jobs jobs have been run or no job has been available for
+        idle_timeout seconds.
+
+        Parameters
+        ----------
+        broker: [FileBroker] broker shared with the submitting process
+        session_factory: [callable] returning a ProdriskSession with a clean model. The session is cleared with
+            clear_model and reused between jobs
+        settings: [dict] settings overriding those of the job, e.g. {'prodrisk_path': '/opt/ltm_core_bin/'}
+        max_jobs: [integer] number of jobs to run before returning, or None to run until idle
+        idle_timeout: [float] seconds without available jobs before returning, or None to never time out
+
+        Returns
+        -------
+        [integer] number of jobs run
+    """
+    if not worker_id:
+        worker_id = f'{socket.gethostname()}_{os.getpid()}'
+    session = None
+    n_jobs = 0
+    idle_since = time.monotonic()
+    while max_jobs is None or n_jobs < max_jobs:
+        job = broker.claim(worker_id)
+        if job is None:
+            if idle_timeout is not None and time.monotonic() - idle_since > idle_timeout:
+                break
+            time.sleep(poll_interval)
+            continue
+
+        stop_heartbeat = threading.Event()
+        heartbeat = threading.Thread(target=_send_heartbeats, args=(broker, job['id'], heartbeat_interval,
+                                                                     stop_heartbeat), daemon=True)
+        heartbeat.start()
+        try:
+            if session is None:
+                session = session_factory()
+            else:
+                session.clear_model()
+            session.load_model_spec(job['spec'])
+            for name, value in (settings or {}).items():
+                setattr(session, name, value)
+            start = time.perf_counter()
+            status = session.run()
+            run_time = time.perf_counter() - start
+            if status is not True:
+                raise RuntimeError('The ProdRisk run failed, check the log on the worker for details')
+            result = {'status': status, 'results': session.get_results(), 'worker': worker_id,
+                      'attempt': job['attempts'], 'run_time': run_time}
+        except Exception:
+            stop_heartbeat.set()
+            heartbeat.join()
+            broker.fail(job['id'], f'{worker_id}: {traceback.format_exc()}')
+            session = None
+        else:
+            stop_heartbeat.set()
+            heartbeat.join()
+            broker.complete(job['id'], result)
+        n_jobs += 1
+        idle_since = time.monotonic()
+    return n_jobs
+
+
+def _send_heartbeats(broker, job_id, interval, stop):
+    while not stop.wait(interval):
+        broker.heartbeat(job_id)
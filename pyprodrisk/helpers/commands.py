@@ -1,41 +1,53 @@
 import re
 
+# Patterns are compiled once at import, the tokenizer is called once per line of potentially very large command files
+_LINE_SPLIT = re.compile('\n+|\r+')
+_WHITESPACE_SPLIT = re.compile(r'\s+')
+
 
 def get_commands_from_file(command_file_string):
     # Split file into lines
-    lines = re.split('\n+|\r+', command_file_string)
-    entries = []
+    lines = _LINE_SPLIT.split(command_file_string)
+    return list(iter_commands(lines))
+
+
+def iter_commands(lines):
+    # Stream command entries from any iterable of lines (e.g. an open file), without holding the whole file in memory
     for line in lines:
+        line = line.rstrip('\r\n')
         # Skip comments and lines starting with whitespace
         if not line or line[0] == '#' or line[0] == '\t' or line[0] == ' ':
             continue
-        # Clean up
-        entry = {}
-        line = line.replace('/ ', '/')
-
-        # Split on whitespace
-        split_line = re.split(r'\s+', line)
-
-        # Set command
-        command = split_line[0]
-        if len(split_line) > 1:
-            command += ' ' + split_line[1]
-        entry['command'] = command.lower()
-
-        # Set options and values
-        options = []
-        values = []
-        for i in range(2, len(split_line)):
-            # Objects have leading "/"
-            if split_line[i] and split_line[i][0] == '/':
-                options.append(split_line[i][1:].lower())
-            else:  # Value or password
-                if split_line[1] == 'password':
-                    pwd = split_line[i].split('=')
-                    values.append(pwd[0].upper() + '=' + pwd[1])
-                else:
-                    values.append(split_line[i])
-        entry['options'] = options
-        entry['values'] = values
-        entries.append(entry)
-    return entries
+        yield get_command_from_line(line)
+
+
+def get_command_from_line(line):
+    # Clean up
+    entry = {}
+    line = line.replace('/ ', '/')
+
+    # Split on whitespace
+    split_line = _WHITESPACE_SPLIT.split(line.rstrip())
+
+    # Set command
+    command = split_line[0]
+    if len(split_line) > 1:
+        command += ' ' + split_line[1]
+    entry['command'] = command.lower()
+
+    # Set options and values
+    options = []
+    values = []
+    for i in range(2, len(split_line)):
+        # Objects have leading "/"
+        if split_line[i] and split_line[i][0] == '/':
+            options.append(split_line[i][1:].lower())
+        else:  # Value or password
+            if split_line[1] == 'password':
+                pwd = split_line[i].split('=')
+                values.append(pwd[0].upper() + '=' + pwd[1])
+            else:
+                values.append(split_line[i])
+    entry['options'] = options
+    entry['values'] = values
+    return entry
@@ -0,0 +1,146 @@
+import os
+import re
+import threading
+import time
+
+# Default patterns for lines of interest in the ProdRisk log. Values of the named groups are converted to float when
+# possible and added to the event. The wording of the log differs between ProdRisk versions, so the patterns can be
+# replaced through the patterns argument of LogMonitor.
+DEFAULT_PATTERNS = {
+    'iteration': re.compile(r'\b[Ii]teration\s*(?:no\.?|nr\.?|number)?\s*[:=]?\s*(?P<iteration>\d+)'),
+    'gap': re.compile(r'\b(?:[Gg]ap|[Cc]onvergence)\b[^0-9+-]*(?P<gap>[-+]?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)'),
+    'phase': re.compile(r'(?P<phase>[A-Za-z][\w ]*?)\s+(?:time|took|used)\s*[:=]?\s*'
+                        r'(?P<seconds>\d+(?:\.\d*)?)\s*(?:s|sec|seconds)\b'),
+}
+
+
+class LogMonitor(object):
+
+    # Tails a log file while ProdRisk runs. Only output written after start() is read, and each poll only reads what
+    # has been appended since the last poll. Lines matching the patterns are turned into events, which are passed to
+    # the callback and kept for the summary.
+
+    def __init__(self, log_file, callback=None, patterns=None, poll_interval=0.5, stall_timeout=None,
+                 clock=time.monotonic):
+        """
+            Parameters
+            ----------
+            log_file: [string] log file written by ProdRisk
+            callback: [callable] called with each event dict, from the monitor thread
+            patterns: [dict] event type to compiled regular expression with named groups, defaults to
+                DEFAULT_PATTERNS
+            poll_interval: [float] seconds between each read of the log file
+            stall_timeout: [float] emit a "stall" event when nothing has been written for this many seconds
+            clock: [callable] returning the current time in seconds, used for stall detection and elapsed times
+        """
+        self._log_file = log_file
+        self._callback = callback
+        self._patterns = patterns if patterns is not None else DEFAULT_PATTERNS
+        self._poll_interval = poll_interval
+        self._stall_timeout = stall_timeout
+        self._clock = clock
+        self._position = 0
+        self._partial_line = ''
+        self._events = []
+        self._n_lines = 0
+        self._start = None
+        self._last_output = None
+        self._stalled = False
+        self._n_stalls = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def events(self):
+        return self._events
+
+    def start(self):
+        self._start = self._clock()
+        self._last_output = self._start
+        try:
+            self._position = os.path.getsize(self._log_file)
+        except OSError:
+            self._position = 0
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        # Read what was written after the last poll, including an unterminated last line
+        self.poll()
+        if self._partial_line:
+            self._parse_line(self._partial_line)
+            self._partial_line = ''
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _run(self):
+        while not self._stop.wait(self._poll_interval):
+            self.poll()
+
+    def poll(self):
+        try:
+            with open(self._log_file, 'rb') as f:
+                f.seek(self._position)
+                new_output = f.read().decode(errors='replace')
+                self._position = f.tell()
+        except OSError:
+            new_output = ''
+
+        now = self._clock()
+        if new_output:
+            self._last_output = now
+            self._stalled = False
+            lines = (self._partial_line + new_output).split('\n')
+            self._partial_line = lines.pop()
+            for line in lines:
+                self._parse_line(line.rstrip('\r'))
+        elif self._stall_timeout is not None and not self._stalled and now - self._last_output > self._stall_timeout:
+            self._stalled = True
+            self._n_stalls += 1
+            self._emit({'type': 'stall', 'idle_seconds': now - self._last_output})
+
+    def _parse_line(self, line):
+        self._n_lines += 1
+        for event_type, pattern in self._patterns.items():
+            match = pattern.search(line)
+            if match:
+                event = {'type': event_type, 'line': line}
+                for key, value in match.groupdict().items():
+                    try:
+                        event[key] = float(value)
+                    except (TypeError, ValueError):
+                        event[key] = value.strip() if isinstance(value, str) else value
+                self._emit(event)
+
+    def _emit(self, event):
+        event['elapsed'] = self._clock() - self._start
+        self._events.append(event)
+        if self._callback is not None:
+            self._callback(event)
+
+    def summary(self):
+        iterations = [event['iteration'] for event in self._events if event['type'] == 'iteration']
+        gaps = [event['gap'] for event in self._events if event['type'] == 'gap']
+        phases = {}
+        for event in self._events:
+            if event['type'] == 'phase':
+                phases[event['phase']] = phases.get(event['phase'], 0.0) + event['seconds']
+        return {
+            'n_lines': self._n_lines,
+            'n_iterations': int(max(iterations)) if iterations else 0,
+            'gaps': gaps,
+            'final_gap': gaps[-1] if gaps else None,
+            'phase_seconds': phases,
+            'n_stalls': self._n_stalls,
+            'elapsed': self._clock() - self._start if self._start is not None else 0.0,
+        }
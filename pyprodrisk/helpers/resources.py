@@ -0,0 +1,193 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+try:
+    import psutil
+except ImportError:  # Optional, /proc is used on Linux without it
+    psutil = None
+
+
+def get_cpu_times():
+    # CPU time (user + system) in seconds of this process, and of the child processes that have been waited for
+    times = os.times()
+    return times.user + times.system, times.children_user + times.children_system
+
+
+def _get_proc_rss(pid, page_size):
+    # Resident set size in bytes of a process from /proc, or 0 if it has ended
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            return int(f.read().split()[1]) * page_size
+    except (OSError, IndexError, ValueError):
+        return 0
+
+
+def _get_proc_children(pid):
+    # Process ids of all descendants of a process. The parent of each process is read from /proc/<pid>/stat, where
+    # the parent id follows the state after the command name
+    parents = {}
+    for name in os.listdir('/proc'):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f'/proc/{name}/stat') as f:
+                parents[int(name)] = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):  # Ended while listing
+            pass
+    descendants = []
+    generation = {pid}
+    while generation:
+        generation = {child for child, parent in parents.items() if parent in generation}
+        descendants += generation
+    return descendants
+
+
+def get_process_rss():
+    """
+        Current resident set size in bytes of this process, and the sum over all its descendant processes (e.g. the
+        ProdRisk solver and MPI processes). Uses psutil if it is installed, else /proc on Linux.
+
+        Returns
+        -------
+        [tuple] (rss, children_rss), or (None, None) where it is not available
+    """
+    if psutil is not None:
+        process = psutil.Process()
+        children_rss = 0
+        for child in process.children(recursive=True):
+            try:
+                children_rss += child.memory_info().rss
+            except psutil.Error:  # Ended while listing
+                pass
+        return process.memory_info().rss, children_rss
+    if not os.path.isdir('/proc'):
+        return None, None
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    pid = os.getpid()
+    return _get_proc_rss(pid, page_size), sum(_get_proc_rss(child, page_size) for child in _get_proc_children(pid))
+
+
+def _get_file_sizes(directory):
+    sizes = {}
+    for root, _, files in os.walk(directory):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                sizes[path] = os.path.getsize(path)
+            except OSError:  # Removed while walking
+                pass
+    return sizes
+
+
+class ResourceMonitor(object):
+
+    # Wall and CPU time of the phases of a run, peak memory, and bytes written to a directory. Memory and the directory
+    # are sampled before the run, periodically while it runs and after it, so that short lived solver processes and
+    # files removed by ProdRisk before the end of the run are also counted. Peak memory is the largest resident set
+    # size sampled during the run, of this process and of the sum over its descendant processes. Bytes written are the
+    # sizes of new files plus the growth of existing files.
+
+    def __init__(self, directory=None, poll_interval=0.5):
+        """
+            Parameters
+            ----------
+            directory: [string] directory to measure bytes written to, or None to not measure it. The directory may
+                be created during the run
+            poll_interval: [float] seconds between each sample of memory and scan of the directory
+        """
+        self._directory = directory
+        self._poll_interval = poll_interval
+        self._phases = {}
+        self._initial_sizes = {}
+        self._max_sizes = {}
+        self._found_directory = False
+        self._peak_rss = None
+        self._peak_rss_children = None
+        self._start = None
+        self._started_at = None
+        self._wall_time = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._started_at = pd.Timestamp('now')
+        self._start = time.perf_counter()
+        if self._directory:
+            self._initial_sizes = _get_file_sizes(self._directory)
+        self._sample()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._wall_time = time.perf_counter() - self._start
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            self._sample()
+
+    def _run(self):
+        while not self._stop.wait(self._poll_interval):
+            self._sample()
+
+    def _sample(self):
+        rss, children_rss = get_process_rss()
+        if rss is not None:
+            self._peak_rss = max(rss, self._peak_rss or 0)
+            self._peak_rss_children = max(children_rss, self._peak_rss_children or 0)
+        if self._directory:
+            self._scan()
+
+    def _scan(self):
+        if os.path.isdir(self._directory):
+            self._found_directory = True
+        for path, size in _get_file_sizes(self._directory).items():
+            if size > self._max_sizes.get(path, -1):
+                self._max_sizes[path] = size
+
+    @contextmanager
+    def phase(self, name):
+        # Measure the wall and CPU time of the with block, CPU time includes child processes
+        start = time.perf_counter()
+        cpu, children_cpu = get_cpu_times()
+        try:
+            yield
+        finally:
+            end_cpu, end_children_cpu = get_cpu_times()
+            self._phases[name] = {'wall': time.perf_counter() - start, 'cpu': end_cpu - cpu,
+                                  'children_cpu': end_children_cpu - children_cpu}
+
+    @property
+    def bytes_written(self):
+        if not self._directory or not self._found_directory:
+            return None
+        return sum(max(size - self._initial_sizes.get(path, 0), 0) for path, size in self._max_sizes.items())
+
+    def get_record(self, **extra):
+        """
+            Returns
+            -------
+            [dict] with the start time, total wall time, wall, cpu and children_cpu seconds of each phase as
+            <phase>_wall etc., peak_rss and peak_rss_children in bytes, bytes_written, and the extra items
+        """
+        record = {'started_at': self._started_at.isoformat() if self._started_at is not None else None,
+                  'wall': self._wall_time}
+        for name, times in self._phases.items():
+            for key, value in times.items():
+                record[f'{name}_{key}'] = value
+        record.update({'peak_rss': self._peak_rss, 'peak_rss_children': self._peak_rss_children,
+                       'bytes_written': self.bytes_written})
+        record.update(extra)
+        return record
+
+
+def append_metrics(filename, record):
+    # Append a record as one line of JSON
+    with open(filename, 'a') as f:
+        f.write(json.dumps(record, default=str) + '\n')
@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+
+_RESOLUTIONS = {
+    'week': pd.Timedelta(weeks=1),
+    'hour': pd.Timedelta(hours=1),
+}
+
+
+def iter_scenario_file(filename, columns, chunksize=100000):
+    # Yield DataFrame chunks of the given columns from a csv or parquet file
+    if str(filename).lower().endswith('.parquet'):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError('pyarrow is required to read parquet scenario files')
+        parquet_file = pq.ParquetFile(filename)
+        for batch in parquet_file.iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        for chunk in pd.read_csv(filename, usecols=columns, chunksize=chunksize):
+            yield chunk
+
+
+def read_scenarios(chunks, start_time, n_weeks, n_scenarios, time_column='time', scenario_column='scenario',
+                   value_columns=None, resolution='week', fill=False):
+    """
+        Resample chunked long format scenario data to the optimization period. The data of each scenario is aligned to
+        start_time by its first timestamp, averaged over each time step of the given resolution and truncated to
+        n_weeks. The first n_scenarios scenarios found are kept in order of appearance. Memory use is bounded by the
+        size of the resampled output, not by the size of the input.
+
+        Parameters
+        ----------
+        chunks: [iterable] DataFrames with a time column, a scenario column and one column per series. Rows of each
+            scenario must be sorted by time
+        start_time: [pandas.Timestamp] start of optimization period
+        n_weeks: [integer] number of weeks in optimization period
+        n_scenarios: [integer] number of scenarios to read
+        value_columns: [list] columns to read, defaults to all columns except the time and scenario columns
+        resolution: [string] "week" or "hour"
+        fill: [boolean] fill time steps without data (gaps, or scenarios ending before the end of the period) with the
+            last value of the scenario. By default a ValueError listing the missing time steps and scenarios is raised
+
+        Returns
+        -------
+        [dict] of pandas.DataFrame with one column per scenario, for each value column
+    """
+    if resolution not in _RESOLUTIONS:
+        raise ValueError(f'Unknown resolution: "{resolution}", possible values are {list(_RESOLUTIONS.keys())}')
+    step_ns = _RESOLUTIONS[resolution].value
+    n_steps = int(pd.Timedelta(weeks=n_weeks).value // step_ns)
+
+    scenario_codes = {}
+    anchors = np.zeros(n_scenarios, dtype=np.int64)
+    sums = {}
+    counts = np.zeros((n_steps, n_scenarios), dtype=np.int64)
+
+    for chunk in chunks:
+        if value_columns is None:
+            value_columns = [c for c in chunk.columns if c not in (time_column, scenario_column)]
+        if not sums:
+            sums = {column: np.zeros((n_steps, n_scenarios)) for column in value_columns}
+
+        times = pd.to_datetime(chunk[time_column]).values.astype('datetime64[ns]').astype(np.int64)
+        scenarios = chunk[scenario_column].to_numpy()
+
+        # Register scenarios seen for the first time, anchored at their first timestamp
+        first_indices = np.flatnonzero(~pd.Index(scenarios).duplicated())
+        for first_index in first_indices:
+            scenario = scenarios[first_index]
+            if scenario not in scenario_codes and len(scenario_codes) < n_scenarios:
+                anchors[len(scenario_codes)] = times[first_index]
+                scenario_codes[scenario] = len(scenario_codes)
+        codes = pd.Series(scenarios).map(scenario_codes).to_numpy(dtype=float, na_value=np.nan)
+
+        valid = ~np.isnan(codes)
+        codes = codes[valid].astype(np.int64)
+        steps = (times[valid] - anchors[codes]) // step_ns
+        in_period = (steps >= 0) & (steps < n_steps)
+        codes = codes[in_period]
+        steps = steps[in_period]
+
+        # Accumulate with bincount on the flattened (step, scenario) index, which is much faster than np.add.at
+        flat_index = steps * n_scenarios + codes
+        size = n_steps * n_scenarios
+        counts += np.bincount(flat_index, minlength=size).reshape(n_steps, n_scenarios)
+        for column in value_columns:
+            values = chunk[column].to_numpy(dtype=float)[valid][in_period]
+            sums[column] += np.bincount(flat_index, weights=values, minlength=size).reshape(n_steps, n_scenarios)
+
+    if len(scenario_codes) < n_scenarios:
+        raise ValueError(f'Found {len(scenario_codes)} scenarios, expected at least {n_scenarios}')
+
+    index = pd.DatetimeIndex(pd.Timestamp(start_time).value + np.arange(n_steps, dtype=np.int64) * step_ns)
+    scenario_names = list(scenario_codes.keys())
+    scenario_data = {}
+    for column, column_sums in sums.items():
+        with np.errstate(invalid='ignore', divide='ignore'):
+            values = column_sums / counts
+        missing = np.isnan(values)
+        if missing.any() and not fill:
+            steps, scenarios = np.nonzero(missing)
+            raise ValueError(f'Scenario data for "{column}" is missing {missing.sum()} time steps: '
+                             f'{_format_missing(index, scenario_names, steps, scenarios)}. Use fill=True to fill '
+                             f'them with the last value of the scenario')
+        df = pd.DataFrame(values, index=index)
+        if missing.any():
+            df = df.ffill()
+            if df.isna().values.any():
+                raise ValueError(f'Scenario data for "{column}" does not cover the start of the optimization period')
+        scenario_data[column] = df
+    return scenario_data
+
+
+def _format_missing(index, scenario_names, steps, scenarios, max_items=10):
+    # The first missing (time step, scenario) pairs, as "<time> (scenario <name>)"
+    items = [f'{index[step]} (scenario {scenario_names[scenario]})'
+             for step, scenario in zip(steps[:max_items], scenarios[:max_items])]
+    if steps.size > max_items:
+        items.append(f'and {steps.size - max_items} more')
+    return ', '.join(items)
@@ -1,25 +1,98 @@
+from functools import lru_cache
+
+import numpy as np
 import pandas as pd
 
+_API_TIME_FORMAT = '%Y%m%d%H%M%S'
+
+# Length of one step of each time unit used by the API core, in nanoseconds
+TIME_UNIT_NS = {
+    'hour': 3600 * 10**9,
+    'minute': 60 * 10**9,
+    'second': 10**9,
+}
+
+# Multipliers used to compose/decompose the YYYYMMDDHHMMSS integer representation of API time strings
+_YEAR = 10**10
+_MONTH = 10**8
+_DAY = 10**6
+_HOUR = 10**4
+_MINUTE = 10**2
+
 
 def get_api_timestring(timestamp: pd.Timestamp) -> str:
     # Return timestamp in format expected by api
-    return timestamp.strftime('%Y%m%d%H%M%S')
+    return timestamp.strftime(_API_TIME_FORMAT)
 
 
-def get_api_datetime(time_string: str) -> pd.Timestamp:
-    time_format = '%Y%m%d%H%M%S'
-    time_string = time_string[0:14]
-    time_string_len = len(time_string)
-
+@lru_cache(maxsize=None)
+def _get_api_time_format(time_string_len: int) -> str:
     # Handle the following cases '%Y%m%d%H%M%S', '%Y%m%d%H%M', %Y%m%d%H' and %Y%m%d'
     missing_digits = 14 - time_string_len
-    relevant_time_format_len = len(time_format) - missing_digits
+    relevant_time_format_len = len(_API_TIME_FORMAT) - missing_digits
 
     # Make sure format string does not end with "%". These cases will still fail, but return more intelligible errors
     if relevant_time_format_len % 2 == 1:
         relevant_time_format_len -= 1
 
+    return _API_TIME_FORMAT[0:relevant_time_format_len]
+
+
+def get_api_datetime(time_string: str) -> pd.Timestamp:
+    time_string = time_string[0:14]
+
     # Return timestamp using format string inferred from input time_string
-    relevant_time_format = time_format[0:relevant_time_format_len]
+    relevant_time_format = _get_api_time_format(len(time_string))
     timestamp = pd.to_datetime(time_string, format=relevant_time_format)
     return timestamp
+
+
+def get_api_datetimes(time_strings) -> pd.DatetimeIndex:
+    # Convert an array of API time strings to a DatetimeIndex. All strings are padded to full second resolution and
+    # parsed as YYYYMMDDHHMMSS integers, so the conversion is done with int64 arithmetic on the whole array
+    time_strings = np.asarray(time_strings, dtype=str).astype('U14')
+    if time_strings.size == 0:
+        return pd.DatetimeIndex([])
+    values = np.char.ljust(time_strings, 14, '0').astype(np.int64)
+    parts = pd.DataFrame({
+        'year': values // _YEAR,
+        'month': values // _MONTH % 100,
+        'day': values // _DAY % 100,
+        'hour': values // _HOUR % 100,
+        'minute': values // _MINUTE % 100,
+        'second': values % 100,
+    })
+    return pd.DatetimeIndex(pd.to_datetime(parts)).astype('datetime64[ns]')
+
+
+def get_api_timestrings(timestamps) -> np.ndarray:
+    # Convert timestamps to API time strings by composing the YYYYMMDDHHMMSS integer of each timestamp
+    timestamps = pd.DatetimeIndex(timestamps)
+    values = timestamps.year.to_numpy(np.int64) * _YEAR + timestamps.month.to_numpy(np.int64) * _MONTH + \
+        timestamps.day.to_numpy(np.int64) * _DAY + timestamps.hour.to_numpy(np.int64) * _HOUR + \
+        timestamps.minute.to_numpy(np.int64) * _MINUTE + timestamps.second.to_numpy(np.int64)
+    return values.astype(str)
+
+
+def get_time_unit_ns(time_unit: str) -> int:
+    if time_unit not in TIME_UNIT_NS:
+        raise ValueError(f'Unknown time unit: "{time_unit}"')
+    return TIME_UNIT_NS[time_unit]
+
+
+def get_datetimes_from_offsets(start_time: pd.Timestamp, offsets, time_unit: str = 'hour') -> pd.DatetimeIndex:
+    # Timestamps of integer offsets from start_time, given in the API time unit
+    offsets = np.asarray(offsets, dtype=np.int64)
+    return pd.DatetimeIndex(pd.Timestamp(start_time).value + offsets * get_time_unit_ns(time_unit))
+
+
+def get_offsets_from_datetimes(start_time: pd.Timestamp, timestamps, time_unit: str = 'hour') -> np.ndarray:
+    # Integer offsets of timestamps relative to start_time in the API time unit. Timestamps that are not a whole number
+    # of time units from start_time raise a ValueError, instead of being truncated
+    unit_ns = get_time_unit_ns(time_unit)
+    diff_ns = pd.DatetimeIndex(timestamps).values.astype('datetime64[ns]').astype(np.int64) - \
+        pd.Timestamp(start_time).value
+    offsets, remainder = np.divmod(diff_ns, unit_ns)
+    if remainder.any():
+        raise ValueError(f'all time intervals must be given in full {time_unit}s')
+    return offsets
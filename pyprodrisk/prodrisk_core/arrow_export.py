@@ -0,0 +1,144 @@
+import os
+
+import numpy as np
+
+from ..helpers.time import get_api_datetime, get_time_unit_ns
+from ..prodrisk_core.prodrisk_api import get_attribute_datatypes
+
+# Export of attributes to Arrow tables built directly from the NumPy arrays returned by the API, without creating
+# pandas objects. Scalar attributes give one table per object type with one row per object. TXY attributes give one
+# table per object type and attribute, with columns object_name, time and scenario_0 ... scenario_<n-1>, and one
+# record batch per object. The object_name column of TXY tables is dictionary encoded, with all object names of the type
+# as a dictionary shared by every batch, so that each batch only holds one int32 index per row and the batches can be
+# written to an Arrow IPC file.
+
+_SCALAR_DATATYPES = ['int', 'double', 'string']
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError('pyarrow is required to export Arrow tables')
+    return pyarrow
+
+
+def _get_object_names(api, object_type):
+    return [name for name, t in zip(api.GetObjectNamesInSystem(), api.GetObjectTypesInSystem()) if t == object_type]
+
+
+def get_scalar_table(api, object_type, direction=None):
+    pa = _import_pyarrow()
+    object_names = _get_object_names(api, object_type)
+    columns = {'object_name': pa.array(object_names, type=pa.string())}
+    for attribute_name, datatype in get_attribute_datatypes(api, object_type, _SCALAR_DATATYPES, direction).items():
+        if datatype == 'int':
+            values = np.array([api.GetIntValue(object_type, name, attribute_name) for name in object_names],
+                              dtype=np.int64)
+            columns[attribute_name] = pa.array(values, mask=values <= -2**15+1)
+        elif datatype == 'double':
+            values = np.array([api.GetDoubleValue(object_type, name, attribute_name) for name in object_names],
+                              dtype=np.float64)
+            columns[attribute_name] = pa.array(values, mask=values <= -1e37)
+        else:
+            values = [api.GetStringValue(object_type, name, attribute_name) for name in object_names]
+            columns[attribute_name] = pa.array(values, type=pa.string())
+    return pa.table(columns)
+
+
+def get_txy_schema(n_scenarios, float_dtype=np.float64):
+    pa = _import_pyarrow()
+    value_type = pa.from_numpy_dtype(np.dtype(float_dtype))
+    fields = [pa.field('object_name', pa.dictionary(pa.int32(), pa.string())), pa.field('time', pa.timestamp('ns'))]
+    fields += [pa.field(f'scenario_{i}', value_type) for i in range(n_scenarios)]
+    return pa.schema(fields)
+
+
+def iter_txy_batches(api, object_type, attribute_name, n_scenarios, object_names=None, float_dtype=np.float64):
+    # One record batch per object with the attribute set. Series with a single column (deterministic) are given for
+    # all scenarios, so that all batches share the same schema
+    pa = _import_pyarrow()
+    schema = get_txy_schema(n_scenarios, float_dtype)
+    unit_ns = get_time_unit_ns(api.GetTimeUnit())
+    if object_names is None:
+        object_names = _get_object_names(api, object_type)
+    dictionary = pa.array(object_names, type=pa.string())
+    for index, object_name in enumerate(object_names):
+        start_time = api.GetTxySeriesStartTime(object_type, object_name, attribute_name)
+        if not start_time:
+            continue
+        t = np.asarray(api.GetTxySeriesT(object_type, object_name, attribute_name), dtype=np.int64)
+        y = np.asarray(api.GetTxySeriesY(object_type, object_name, attribute_name))
+        y = y.reshape(t.size, -1)
+        if y.shape[1] != 1 and y.shape[1] != n_scenarios:
+            raise ValueError(f'{object_type} {object_name} {attribute_name} has {y.shape[1]} scenarios, '
+                             f'expected {n_scenarios}')
+        # One row per scenario, so that each scenario is a C-contiguous view Arrow uses without copying. The dtype
+        # conversion and the transpose are done in a single pass, and nothing is copied when the core returns
+        # column major values of the requested dtype
+        scenarios = np.ascontiguousarray(y.T, dtype=float_dtype)
+        time = get_api_datetime(start_time).value + t * unit_ns
+        columns = [pa.DictionaryArray.from_arrays(pa.array(np.full(t.size, index, dtype=np.int32)), dictionary),
+                   pa.array(time.view('datetime64[ns]'))]
+        if scenarios.shape[0] == 1:
+            # Series with a single column (deterministic) share the same values for all scenarios
+            columns += [pa.array(scenarios[0])] * n_scenarios
+        else:
+            columns += [pa.array(scenarios[i]) for i in range(n_scenarios)]
+        yield pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+def get_txy_table(api, object_type, attribute_name, n_scenarios, object_names=None, float_dtype=np.float64):
+    pa = _import_pyarrow()
+    batches = list(iter_txy_batches(api, object_type, attribute_name, n_scenarios, object_names, float_dtype))
+    return pa.Table.from_batches(batches, schema=get_txy_schema(n_scenarios, float_dtype))
+
+
+def write_table_batches(batches, schema, filename, file_format='parquet'):
+    # Write record batches one at a time, so that only one batch is held in memory
+    pa = _import_pyarrow()
+    if file_format == 'parquet':
+        import pyarrow.parquet as pq
+        with pq.ParquetWriter(filename, schema) as writer:
+            for batch in batches:
+                writer.write_batch(batch)
+    elif file_format == 'ipc':
+        with pa.OSFile(filename, 'wb') as sink:
+            with pa.ipc.new_file(sink, schema) as writer:
+                for batch in batches:
+                    writer.write_batch(batch)
+    else:
+        raise ValueError(f'Unknown file format: "{file_format}", possible values are "parquet" and "ipc"')
+
+
+def export_attributes(api, directory, n_scenarios, direction='output', file_format='parquet', ignores=(),
+                      float_dtype=np.float64):
+    """
+        Write one file per object type with its scalar attributes, and one file per object type and TXY attribute,
+        named <object_type>.<ext> and <object_type>.<attribute_name>.<ext>.
+
+        Returns
+        -------
+        [list] of the files written
+    """
+    os.makedirs(directory, exist_ok=True)
+    extension = 'parquet' if file_format == 'parquet' else 'arrow'
+    object_types = []
+    for object_type in api.GetObjectTypesInSystem():
+        if object_type not in object_types and object_type not in ignores:
+            object_types.append(object_type)
+
+    filenames = []
+    for object_type in object_types:
+        scalar_table = get_scalar_table(api, object_type, direction)
+        if scalar_table.num_columns > 1:
+            filename = os.path.join(directory, f'{object_type}.{extension}')
+            write_table_batches(scalar_table.to_batches(), scalar_table.schema, filename, file_format)
+            filenames.append(filename)
+        object_names = _get_object_names(api, object_type)
+        for attribute_name in get_attribute_datatypes(api, object_type, ['txy', 'txy_stochastic'], direction):
+            filename = os.path.join(directory, f'{object_type}.{attribute_name}.{extension}')
+            batches = iter_txy_batches(api, object_type, attribute_name, n_scenarios, object_names, float_dtype)
+            write_table_batches(batches, get_txy_schema(n_scenarios, float_dtype), filename, file_format)
+            filenames.append(filename)
+    return filenames
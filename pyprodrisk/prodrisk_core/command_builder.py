@@ -0,0 +1,156 @@
+import pandas as pd
+
+from ..helpers.commands import iter_commands
+from ..prodrisk_core.prodrisk_api import set_attribute
+
+# Supported commands. Object names given as options are matched case insensitively, since the tokenizer lower cases
+# all options:
+#
+#   add <object_type> <name> [<name> ...]
+#   set <setting_name> <value> [<value> ...]
+#   set <attribute_name> /<object_type> /<object_name> <value> [<value> ...]
+#   set n_scenarios <n>
+#   set optimization_period <start_time> [<n_weeks>]
+#   run
+#
+# Consecutive "set" commands are collected in a batch and applied directly through the API once the batch is closed
+# by another command or the end of the file. Attribute datatypes and object names are looked up once per file instead
+# of once per line, and repeated assignments to the same attribute within a batch only reach the API once.
+
+_SCALAR_CONVERTERS = {
+    'int': int,
+    'double': float,
+}
+
+
+class CommandBuilder(object):
+
+    def __init__(self, session):
+        self._session = session
+        self._api = session._pb_api
+        self._datatypes = {}
+        self._object_types = None
+        self._object_names = None
+        self._settings = None
+        self._batch = {}
+
+    def execute_file(self, filename):
+        with open(filename, 'r') as f:
+            return self.execute(iter_commands(f))
+
+    def execute_string(self, command_string):
+        return self.execute(iter_commands(command_string.splitlines()))
+
+    def execute(self, entries):
+        n_commands = 0
+        for entry in entries:
+            command = entry['command'].split(' ')
+            if command[0] == 'set' and len(command) > 1:
+                self._add_to_batch(command[1], entry['options'], entry['values'])
+            elif command[0] == 'add' and len(command) > 1:
+                self.flush()
+                self._add_objects(command[1], entry['values'])
+            elif command[0] == 'run':
+                self.flush()
+                self._session.run()
+            else:
+                raise ValueError(f'Unknown command: "{entry["command"]}"')
+            n_commands += 1
+        self.flush()
+        return n_commands
+
+    def flush(self):
+        for (object_type, object_name, attribute_name), (datatype, value) in self._batch.items():
+            if object_type is None:
+                setattr(self._session, attribute_name, value)
+            else:
+                set_attribute(self._api, object_name, object_type, attribute_name, datatype, value)
+        self._batch = {}
+
+    def _add_to_batch(self, name, options, values):
+        if name == 'n_scenarios':
+            self._batch[(None, None, name)] = (None, int(values[0]))
+        elif name == 'optimization_period':
+            # The optimization period changes the time frame later txy values are interpreted in, apply immediately
+            self.flush()
+            n_weeks = int(values[1]) if len(values) > 1 else 52
+            self._session.set_optimization_period(pd.Timestamp(values[0]), n_weeks=n_weeks)
+        elif len(options) == 0:
+            attribute_name, datatype = self._get_setting(name)
+            self._batch[('setting', 'setting', attribute_name)] = (datatype, _convert_values(datatype, values))
+        elif len(options) == 2:
+            object_type = self._get_object_type(options[0])
+            object_name = self._get_object_name(object_type, options[1])
+            attribute_name, datatype = self._get_attribute(object_type, name)
+            self._batch[(object_type, object_name, attribute_name)] = (datatype, _convert_values(datatype, values))
+        else:
+            raise ValueError(f'Expected no options or "/<object_type> /<object_name>" for "set {name}", got {options}')
+
+    def _add_objects(self, object_type, names):
+        object_type = self._get_object_type(object_type)
+        object_names = self._get_object_names()
+        model_type = self._session.model[object_type]
+        for name in names:
+            self._api.AddObject(object_type, name)
+            object_names.setdefault(object_type, {})[name.lower()] = name
+            model_type._add_object_name(name)
+
+    def _get_datatypes(self, object_type):
+        if object_type not in self._datatypes:
+            names = self._api.GetObjectTypeAttributeNames(object_type)
+            datatypes = self._api.GetObjectTypeAttributeDatatypes(object_type)
+            self._datatypes[object_type] = {name.lower(): (name, datatype) for name, datatype in zip(names, datatypes)}
+        return self._datatypes[object_type]
+
+    def _get_object_type(self, object_type):
+        if self._object_types is None:
+            self._object_types = {t.lower(): t for t in self._api.GetObjectTypeNames()}
+        if object_type.lower() not in self._object_types:
+            raise ValueError(f'Unknown object type: "{object_type}"')
+        return self._object_types[object_type.lower()]
+
+    def _get_object_names(self):
+        if self._object_names is None:
+            self._object_names = {}
+            for name, object_type in zip(self._api.GetObjectNamesInSystem(), self._api.GetObjectTypesInSystem()):
+                self._object_names.setdefault(object_type, {})[name.lower()] = name
+        return self._object_names
+
+    def _get_object_name(self, object_type, name):
+        names = self._get_object_names().get(object_type, {})
+        if name.lower() not in names:
+            raise ValueError(f'Unknown object: "{name}" ({object_type})')
+        return names[name.lower()]
+
+    def _get_attribute(self, object_type, name):
+        datatypes = self._get_datatypes(object_type)
+        if name.lower() not in datatypes:
+            raise ValueError(f'Unknown attribute: "{name}" for {object_type}')
+        return datatypes[name.lower()]
+
+    def _get_setting(self, name):
+        if self._settings is None:
+            datatypes = self._get_datatypes('setting')
+            self._settings = dict(datatypes)
+            for snake_name, attribute_name in self._session._settings.items():
+                if attribute_name.lower() in datatypes:
+                    self._settings[snake_name.lower()] = datatypes[attribute_name.lower()]
+        if name.lower() not in self._settings:
+            raise ValueError(f'Unknown setting: "{name}"')
+        return self._settings[name.lower()]
+
+
+def _convert_values(datatype, values):
+    if datatype in _SCALAR_CONVERTERS:
+        return _SCALAR_CONVERTERS[datatype](values[0])
+    elif datatype == 'string':
+        return ' '.join(values)
+    elif datatype == 'int_array':
+        return [int(v) for v in values]
+    elif datatype == 'double_array':
+        return [float(v) for v in values]
+    elif datatype == 'xy':
+        # Reference followed by x y pairs
+        points = [float(v) for v in values[1:]]
+        return dict(ref=float(values[0]), xy=[[x, y] for x, y in zip(points[0::2], points[1::2])])
+    raise ValueError(f'Attributes of datatype "{datatype}" can not be set from a command file')
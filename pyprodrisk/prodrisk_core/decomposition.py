@@ -0,0 +1,87 @@
+from collections import namedtuple
+
+from ..prodrisk_core.topology import ModuleTopology
+
+# Decomposition of a model into hydraulically independent watercourses. Modules connected by waterways or pumps form a
+# watercourse, and pumps belong to the watercourse of their modules. Inflow series are copied to each watercourse with
+# a module connected to them, and all other objects (e.g. areas and settings) are shared and copied to every
+# watercourse. Pumps without known modules go with the first watercourse. The results of a watercourse are only used
+# for the modules and pumps it owns.
+Watercourse = namedtuple('Watercourse', ['module_names', 'owned', 'state'])
+
+
+def get_watercourses(api):
+    # Module names of each independent watercourse
+    topology = ModuleTopology(api)
+    return [[topology.module_names[i] for i in component] for component in topology.get_components()]
+
+
+def decompose_model_state(api, state):
+    """
+        Split a model state (e.g. from get_model_state) of the model in api into one state per watercourse.
+
+        Returns
+        -------
+        [list] of Watercourse(module_names, owned, state), where owned is the set of (object_type, object_name) of the
+        modules and pumps of the watercourse
+    """
+    topology = ModuleTopology(api)
+    components = topology.get_components()
+    labels = topology.get_component_labels()
+    # Components are labelled by their first module
+    component_index = {component[0]: i for i, component in enumerate(components)}
+
+    owners = {}
+    for i, name in enumerate(topology.module_names):
+        owners[('module', name)] = [component_index[labels[i]]]
+    for name, modules in zip(topology.pump_names, topology.pump_modules):
+        known = modules[modules >= 0]
+        # Pumps not connected to any known module are run with the first watercourse only, so that they are not
+        # counted once per watercourse
+        owners[('pump', name)] = [component_index[labels[known[0]]]] if known.size else [0]
+
+    series_components = {}
+    for i, name in enumerate(topology.module_names):
+        series_id = api.GetIntValue('module', name, 'connectedSeriesId')
+        series_components.setdefault(series_id, set()).add(component_index[labels[i]])
+
+    all_components = list(range(len(components)))
+    states = [[] for _ in components]
+    for object_type, object_name, attributes in state:
+        targets = owners.get((object_type, object_name))
+        if targets is None and object_type == 'inflowSeries':
+            series_id = api.GetIntValue('inflowSeries', object_name, 'seriesId')
+            targets = sorted(series_components.get(series_id, all_components))
+        for i in (targets if targets is not None else all_components):
+            states[i].append((object_type, object_name, attributes))
+
+    watercourses = []
+    for i, component in enumerate(components):
+        owned = {key for key, targets in owners.items() if targets == [i]}
+        watercourses.append(Watercourse([topology.module_names[m] for m in component], owned, states[i]))
+    return watercourses
+
+
+def merge_results(watercourses, results):
+    # Results of each watercourse run, limited to the objects owned by the watercourse, as one list
+    merged = []
+    for watercourse, watercourse_results in zip(watercourses, results):
+        merged += [obj for obj in watercourse_results if (obj[0], obj[1]) in watercourse.owned]
+    return merged
+
+
+def get_decomposed_summary(summaries):
+    # Log summary of a decomposed run from the log summaries of the watercourse runs, or None when none of them had a
+    # log. Iterations, gaps and elapsed time are the largest of any watercourse, as the watercourses run in parallel
+    logged = [summary for summary in summaries if summary is not None]
+    if not logged:
+        return None
+    final_gaps = [summary['final_gap'] for summary in logged if summary['final_gap'] is not None]
+    return {
+        'n_lines': sum(summary['n_lines'] for summary in logged),
+        'n_iterations': max(summary['n_iterations'] for summary in logged),
+        'final_gap': max(final_gaps) if final_gaps else None,
+        'n_stalls': sum(summary['n_stalls'] for summary in logged),
+        'elapsed': max(summary['elapsed'] for summary in logged),
+        'watercourses': summaries,
+    }
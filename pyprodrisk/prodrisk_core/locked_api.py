@@ -0,0 +1,143 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from ..helpers.locks import ReadWriteLock
+
+
+class LockedApi(object):
+
+    # Thread safe wrapper around the ProdRisk core. Functions starting with "Get" are treated as reads and may run
+    # concurrently, all other functions are writes and run alone. With cache_reads, results of reads are kept until the
+    # next write, and later identical reads are answered from the cache without taking the lock or calling the core.
+    # Arrays from the cache are copied, so that callers can not modify the cached values. The cache holds at most
+    # max_cache_entries values, and the least recently used values are dropped first.
+
+    def __init__(self, api, cache_reads=True, max_cache_entries=1024):
+        self._api = api
+        self._lock = ReadWriteLock()
+        self._cache_reads = cache_reads
+        self._max_cache_entries = max_cache_entries
+        # Concurrent readers share the read lock, so the cache itself is guarded by a plain lock
+        self._cache_lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._functions = {}
+
+    @property
+    def lock(self):
+        return self._lock
+
+    @property
+    def core(self):
+        return self._api
+
+    @property
+    def n_cached(self):
+        return len(self._cache)
+
+    def clear_cache(self):
+        with self._cache_lock:
+            self._cache = OrderedDict()
+
+    def _get_cached(self, key):
+        # Raises TypeError for unhashable keys
+        with self._cache_lock:
+            value = self._cache.get(key, _MISSING)
+            if value is not _MISSING:
+                self._cache.move_to_end(key)
+        return value
+
+    def _put_cached(self, key, value):
+        with self._cache_lock:
+            self._cache[key] = value
+            while len(self._cache) > self._max_cache_entries:
+                self._cache.popitem(last=False)
+
+    def __getattr__(self, name):
+        if name[0] == '_':
+            raise AttributeError(name)
+        function = self._functions.get(name)
+        if function is None:
+            core_attribute = getattr(self._api, name)
+            if not callable(core_attribute):
+                return core_attribute
+            if name.startswith('Get'):
+                function = self._make_read(name, core_attribute)
+            else:
+                function = self._make_write(core_attribute)
+            self._functions[name] = function
+        return function
+
+    def read_value(self, key, get_value):
+        # Cached result of get_value, which may do several reads that are kept consistent by holding the read lock.
+        # Cache hits do not take the lock
+        value = self._get_cached(key) if self._cache_reads else _MISSING
+        if value is not _MISSING:
+            return _copy(value)
+        with self._lock.read():
+            value = get_value()
+            if self._cache_reads:
+                self._put_cached(key, _copy(value))
+        return value
+
+    def write_value(self, set_value):
+        with self._lock.write():
+            self.clear_cache()
+            return set_value()
+
+    def _make_read(self, name, core_function):
+        def read(*args):
+            key = (name,) + args
+            if self._cache_reads:
+                try:
+                    value = self._get_cached(key)
+                except TypeError:  # Unhashable arguments are never cached
+                    key = None
+                    value = _MISSING
+                if value is not _MISSING:
+                    return _copy(value)
+            with self._lock.read():
+                value = core_function(*args)
+                if self._cache_reads and key is not None:
+                    self._put_cached(key, _copy(value))
+            return value
+        return read
+
+    def _make_write(self, core_function):
+        def write(*args):
+            with self._lock.write():
+                self.clear_cache()
+                return core_function(*args)
+        return write
+
+
+class _Missing(object):
+    pass
+
+
+_MISSING = _Missing()
+
+
+def _copy(value):
+    if isinstance(value, (np.ndarray, pd.Series, pd.DataFrame)):
+        return value.copy()
+    if isinstance(value, list):
+        return [_copy(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _copy(item) for key, item in value.items()}
+    return value
+
+
+def locked_read(api, key, get_value):
+    # Read through the cache and lock of a LockedApi, or directly from other APIs
+    if isinstance(api, LockedApi):
+        return api.read_value(key, get_value)
+    return get_value()
+
+
+def locked_write(api, set_value):
+    if isinstance(api, LockedApi):
+        return api.write_value(set_value)
+    return set_value()
@@ -2,6 +2,7 @@ from graphviz import Digraph
 
 from ..prodrisk_core.prodrisk_api import get_attribute_value, get_xyt_attribute, get_attribute_info, \
     set_attribute, get_object_info
+from ..prodrisk_core.locked_api import locked_read, locked_write
 
 # This check can be used to stops infinite recursion in some debuggers when stepping into __init__. Debuggers can call
 # __dir__ before/during the initialization, and if any class attributes are referred to in both __dir__ and __getattr__
@@ -11,12 +12,14 @@ def is_private_attr(attr):
 
 class ModelBuilderType(object):
 
-    def __init__(self, api, ignores=[]):
+    def __init__(self, api, ignores=[], dtypes=None):
         self._api = api
+        self._dtypes = dtypes
         self._all_types = [object_type for object_type in api.GetObjectTypeNames() if object_type not in ignores ]
                            #  if api.GetObjectInfo(object_type, 'isInput')]
-        self._types = []
+        self._types = {}
         self._ignores = ignores
+        self._object_names = None
         self.update()
 
     def __getattr__(self, object_type):
@@ -26,24 +29,47 @@ class ModelBuilderType(object):
 
         # if self._api.UpdateNeeded():
         #     self.update()
+        # Object types are built on first access, so that only the types actually used are paid for
+        if object_type not in self._types:
+            if object_type not in self._all_types:
+                raise KeyError(object_type)
+            self._types[object_type] = ModelBuilderObject(self._api, self, object_type,
+                                                          self._get_object_names(object_type), self._dtypes)
         return self._types[object_type]
 
     def __dir__(self):
-        return [object_type for object_type in self._types] + \
-               [x for x in super().__dir__() if x[0] != '_' and x not in self._types]
+        return [object_type for object_type in self._all_types] + \
+               [x for x in super().__dir__() if x[0] != '_' and x not in self._all_types]
 
     def __getitem__(self, item):
         return self.__getattr__(item)
 
-    def update(self):
-        objects = {object_type: [] for object_type in self._all_types}
-        for object_name, object_type in zip(self._api.GetObjectNamesInSystem(),
-                                            self._api.GetObjectTypesInSystem()):
-            if object_type not in self._ignores:
-                objects[object_type].append(object_name)
+    def _get_object_names(self, object_type):
+        # The object names of all types are found in a single pass over the system, on first access of any type
+        # The map is built before it is assigned, so that a failed read does not leave a partial map behind
+        if self._object_names is None:
+            object_names = {}
+            for object_name, object_type_in_system in zip(self._api.GetObjectNamesInSystem(),
+                                                          self._api.GetObjectTypesInSystem()):
+                if object_type_in_system not in self._ignores:
+                    object_names.setdefault(object_type_in_system, []).append(object_name)
+            self._object_names = object_names
+        return self._object_names.setdefault(object_type, [])
 
-        self._types = {object_type: ModelBuilderObject(self._api, self, object_type, object_names)
-                       for object_type, object_names in objects.items()}
+    def update(self):
+        # Drop all built object types, they are rebuilt from the system on next access
+        self._types = {}
+        self._object_names = None
+
+    @property
+    def dtypes(self):
+        return self._dtypes
+
+    @dtypes.setter
+    def dtypes(self, dtypes):
+        # Attribute objects hold the dtype policy, so they are rebuilt
+        self._dtypes = dtypes
+        self.update()
 
     def build_connection_tree(self, filename='topology', write_file=False):
         obj_map = {'module': ['reservoir', 'plant', 'gate']}
@@ -181,11 +207,15 @@ class ModelBuilderObjectIterator(object):
 
 
 class ModelBuilderObject(object):
-    def __init__(self, api, parent, object_type, object_names):
+    __slots__ = ('_api', '_parent', '_type', '_names', '_dtypes', '_datatype_dict', 'attributes')
+
+    def __init__(self, api, parent, object_type, object_names, dtypes=None):
         self._api = api
         self._parent = parent
         self._type = object_type
         self._names = object_names
+        self._dtypes = dtypes
+        self._datatype_dict = None
         self.attributes = {}
 
     def __getattr__(self, name):
@@ -193,11 +223,16 @@ class ModelBuilderObject(object):
         if is_private_attr(name):
             return
 
+        # Objects that have been accessed before are found without searching the name list
+        attribute = self.attributes.get(name)
+        if attribute is not None:
+            return attribute
         if name in self._names:
-            if name not in self.attributes:
-                attribute = AttributeBuilderObject(self._api, self._type, name)
-                self.attributes[name] = attribute
-            return self.attributes[name]
+            if self._datatype_dict is None:
+                self._datatype_dict = get_datatype_dict(self._api, self._type)
+            attribute = AttributeBuilderObject(self._api, self._type, name, self._datatype_dict, self._dtypes)
+            self.attributes[name] = attribute
+            return attribute
         else:
             raise AttributeError()
 
@@ -208,10 +243,12 @@ class ModelBuilderObject(object):
         return self.__getattr__(item)
 
     def add_object(self, name):
-        self._api.AddObject(self._type, name)
-        if name in self._api.GetObjectNamesInSystem():
+        # The name list is updated directly instead of reading back the object names in the system. A core that
+        # rejects the object returns False or raises, and the name is then not added
+        added = self._api.AddObject(self._type, name)
+        if added is not False and name not in self._names:
             self._add_object_name(name)
-        return self._parent.__getattr__(self._type).__getattr__(name)
+        return self.__getattr__(name)
 
     def _add_object_name(self, name):
         self._names.append(name)
@@ -226,22 +263,37 @@ class ModelBuilderObject(object):
         return ModelBuilderObjectIterator(self)
 
 
+def get_datatype_dict(api, object_type):
+    return dict(zip(api.GetObjectTypeAttributeNames(object_type), api.GetObjectTypeAttributeDatatypes(object_type)))
+
+
 class AttributeBuilderObject(object):
-    def __init__(self, api, object_type, object_name):
+    __slots__ = ('_api', '_type', '_name', '_dtypes', '_attr_names', '_attribute_objects', 'datatype_dict')
+
+    def __init__(self, api, object_type, object_name, datatype_dict=None, dtypes=None):
+        # The datatype dict is shared by all objects of a type when given by the parent ModelBuilderObject
         self._api = api
         self._type = object_type
         self._name = object_name
-        self._attr_names = list(api.GetObjectTypeAttributeNames(object_type))
-        self._attr_types = list(api.GetObjectTypeAttributeDatatypes(object_type))
-        self.datatype_dict = dict(zip(self._attr_names, self._attr_types))
+        self._dtypes = dtypes
+        self.datatype_dict = datatype_dict if datatype_dict is not None else get_datatype_dict(api, object_type)
+        self._attr_names = list(self.datatype_dict.keys())
+        self._attribute_objects = {}
 
     def __getattr__(self, attr_name):
         # Recursion guard
         if is_private_attr(attr_name):
             return
 
-        if attr_name in self._attr_names:
-            return AttributeObject(self._api, self._type, self._name, attr_name, self.datatype_dict[attr_name])
+        # AttributeObjects are created once per attribute and reused
+        attribute_object = self._attribute_objects.get(attr_name)
+        if attribute_object is not None:
+            return attribute_object
+        if attr_name in self.datatype_dict:
+            attribute_object = AttributeObject(self._api, self._type, self._name, attr_name,
+                                               self.datatype_dict[attr_name], self._dtypes)
+            self._attribute_objects[attr_name] = attribute_object
+            return attribute_object
         elif attr_name == 'generators' and self._type == 'plant':
             return self._get_generators()
         elif attr_name == 'unit_combinations' and self._type == 'plant':
@@ -337,43 +389,49 @@ class AttributeBuilderObject(object):
 
 
 class AttributeObject(object):
-    def __init__(self, api, object_type, name, attr_name, attr_datatype):
+    __slots__ = ('_api', '_type', '_name', '_attr_name', '_attr_datatype', '_dtypes')
+
+    def __init__(self, api, object_type, name, attr_name, attr_datatype, dtypes=None):
         self._api = api
         self._type = object_type
         self._name = name
         self._attr_name = attr_name
         self._attr_datatype = attr_datatype
-
-    def __getattr__(self, call):
-        # Recursion guard
-        if is_private_attr(call):
-            return
-
-        if call == 'get':
-            if self._attr_datatype == 'xyt' and call == 'get':
-                return self._get_xyt
-            else:
-                return self._get
-        else:
-            raise AttributeError()
+        self._dtypes = dtypes
 
     def __dir__(self):
-        return [x for x in super().__dir__() if x[0] != '_'] + ['get']
+        return [x for x in super().__dir__() if x[0] != '_']
 
     def __getitem__(self, item):
-        return self.__getattr__(item)
+        return getattr(self, item)
+
+    def get(self, start_time=None, end_time=None):
+        if self._attr_datatype == 'xyt':
+            return self._get_xyt(start_time, end_time)
+        if start_time is not None or end_time is not None:
+            # Only XYT attributes are read for a period
+            raise TypeError(f'{self._type} {self._name} {self._attr_name} is of type {self._attr_datatype}, '
+                            f'start_time and end_time are only supported for xyt attributes')
+        return self._get()
 
     def _get(self):
-        return get_attribute_value(self._api, self._name, self._type, self._attr_name, self._attr_datatype)
+        # In thread safe sessions the value is read under one lock, keeping the API calls needed for e.g. TXY values
+        # consistent, and later reads are served from the cache until the next write
+        return locked_read(self._api, (self._type, self._name, self._attr_name),
+                           lambda: get_attribute_value(self._api, self._name, self._type, self._attr_name,
+                                                       self._attr_datatype, dtypes=self._dtypes))
 
     def _get_xyt(self, start_time=None, end_time=None):
         if start_time and end_time:
-            return get_xyt_attribute(self._api, self._name, self._type, self._attr_name, start_time, end_time)
+            return locked_read(self._api, (self._type, self._name, self._attr_name, start_time, end_time),
+                               lambda: get_xyt_attribute(self._api, self._name, self._type, self._attr_name,
+                                                         start_time, end_time, dtypes=self._dtypes))
         else:
-            return get_attribute_value(self._api, self._name, self._type, self._attr_name, self._attr_datatype)
+            return self._get()
 
     def set(self, value):
-        set_attribute(self._api, self._name, self._type, self._attr_name, self._attr_datatype, value)
+        locked_write(self._api, lambda: set_attribute(self._api, self._name, self._type, self._attr_name,
+                                                      self._attr_datatype, value))
 
     def help(self):
         print(self._api.GetAttributeInfo(self._type, self._attr_name, 'description'))
@@ -0,0 +1,93 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from ..prodrisk_core.prodrisk_api import get_attribute_value, get_attribute_datatypes, set_attribute
+
+# A model state is a list of (object_type, object_name, {attribute_name: (datatype, value)}) in the order the objects
+# were added to the system. Attributes that have not been set are left out.
+
+
+def get_model_state(api, direction='input', ignores=(), dtypes=None):
+    """
+        Parameters
+        ----------
+        api: ProdRisk core
+        direction: [string] "input", "output" or None for all attributes
+        ignores: [list] object types to leave out
+        dtypes: [DtypePolicy] dtypes of the values, defaults to DEFAULT_DTYPES
+
+        Returns
+        -------
+        [list] of (object_type, object_name, {attribute_name: (datatype, value)})
+    """
+    datatypes = {}
+    state = []
+    for object_name, object_type in zip(api.GetObjectNamesInSystem(), api.GetObjectTypesInSystem()):
+        if object_type in ignores:
+            continue
+        if object_type not in datatypes:
+            datatypes[object_type] = get_attribute_datatypes(api, object_type, direction=direction)
+        attributes = {}
+        for attribute_name, datatype in datatypes[object_type].items():
+            if datatype == 'xyt':
+                continue
+            value = get_attribute_value(api, object_name, object_type, attribute_name, datatype, dtypes=dtypes)
+            if value is not None:
+                attributes[attribute_name] = (datatype, value)
+        state.append((object_type, object_name, attributes))
+    return state
+
+
+def set_model_state(api, state, add_objects=True):
+    # Add the objects of the state to the system and set their attributes. With add_objects=False the objects must
+    # already exist, which is used to restore results on a model that has been built
+    for object_type, object_name, attributes in state:
+        if add_objects:
+            api.AddObject(object_type, object_name)
+        for attribute_name, (datatype, value) in attributes.items():
+            set_attribute(api, object_name, object_type, attribute_name, datatype, value)
+
+
+def get_state_hash(state, *extra):
+    # Stable sha256 hash of a model state and any extra plain values (e.g. optimization period, n_scenarios)
+    h = hashlib.sha256()
+    for object_type, object_name, attributes in state:
+        _update_hash(h, object_type)
+        _update_hash(h, object_name)
+        for attribute_name in sorted(attributes.keys()):
+            _update_hash(h, attribute_name)
+            _update_hash(h, attributes[attribute_name][1])
+    for value in extra:
+        _update_hash(h, value)
+    return h.hexdigest()
+
+
+def _update_hash(h, value):
+    if isinstance(value, (pd.Series, pd.DataFrame)):
+        h.update(b'P')
+        _update_hash(h, value.index.to_numpy())
+        if isinstance(value, pd.DataFrame):
+            _update_hash(h, [str(c) for c in value.columns])
+        else:
+            _update_hash(h, str(value.name))
+        _update_hash(h, value.to_numpy())
+    elif isinstance(value, np.ndarray):
+        if value.dtype == object:
+            _update_hash(h, value.tolist())
+        else:
+            value = np.ascontiguousarray(value)
+            h.update(b'A' + str(value.dtype).encode() + str(value.shape).encode())
+            h.update(value.tobytes())
+    elif isinstance(value, (list, tuple)):
+        h.update(b'L' + str(len(value)).encode())
+        for item in value:
+            _update_hash(h, item)
+    elif isinstance(value, dict):
+        h.update(b'D' + str(len(value)).encode())
+        for key in sorted(value.keys(), key=str):
+            _update_hash(h, key)
+            _update_hash(h, value[key])
+    else:
+        h.update(b'V' + type(value).__name__.encode() + repr(value).encode() + b';')
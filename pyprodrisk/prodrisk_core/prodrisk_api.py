@@ -1,32 +1,63 @@
+from collections import namedtuple
+
 import numpy as np
 import pandas as pd
 
-from ..helpers.time import get_api_datetime, get_api_timestring
+from ..helpers.time import get_api_datetime, get_api_timestring, get_datetimes_from_offsets, \
+    get_offsets_from_datetimes, get_time_unit_ns
+
+# Dtypes of the values returned by get_attribute_value. float_dtype is used for all floating point values, int_dtype
+# for int arrays and point counts, and numpy_arrays returns int_array and double_array values as NumPy arrays instead
+# of lists. The default policy gives the same values as before, while the float32 policy halves the memory of results.
+DtypePolicy = namedtuple('DtypePolicy', ['float_dtype', 'int_dtype', 'numpy_arrays'])
+
+DEFAULT_DTYPES = DtypePolicy(np.float64, np.int64, False)
+FLOAT32_DTYPES = DtypePolicy(np.float32, np.int32, True)
+
+
+def get_dtype_policy(dtypes=None):
+    # Accepts a DtypePolicy, or "float64" (the default) or "float32"
+    if dtypes is None or isinstance(dtypes, DtypePolicy):
+        return dtypes or DEFAULT_DTYPES
+    if dtypes == 'float64':
+        return DEFAULT_DTYPES
+    if dtypes == 'float32':
+        return FLOAT32_DTYPES
+    raise ValueError(f'Unknown dtypes: "{dtypes}", possible values are "float64", "float32" or a DtypePolicy')
+
+
+def _get_array(values, dtype, numpy_arrays):
+    if numpy_arrays:
+        value = np.asarray(values, dtype=dtype)
+        return value if value.size > 0 else None
+    value = list(values)
+    return value if len(value) > 0 else None
+
 
-def get_attribute_value(api, object_name, object_type, attribute_name, datatype, dataframe=True):
+def get_attribute_value(api, object_name, object_type, attribute_name, datatype, dataframe=True, dtypes=None):
+    dtypes = dtypes or DEFAULT_DTYPES
+    float_dtype = dtypes.float_dtype
     value = None
     if datatype == 'int':
         value = api.GetIntValue(object_type, object_name, attribute_name)
         if value <= -2**15+1: # largest possible INT_MIN (init value in API core)
             value = None      # i.e. attribute has not been set
     elif datatype == 'int_array':
-        value = list(api.GetIntArray(object_type, object_name, attribute_name))
-        if len(value) == 0:
-            value = None
+        value = _get_array(api.GetIntArray(object_type, object_name, attribute_name), dtypes.int_dtype,
+                           dtypes.numpy_arrays)
     elif datatype == 'double':
         value = api.GetDoubleValue(object_type, object_name, attribute_name)
         if value <= -1e37: # largest possible -DBL_MAX (init value in API core)
             value = None
     elif datatype == 'double_array':
-        value = list(api.GetDoubleArray(object_type, object_name, attribute_name))
-        if len(value) == 0:
-            value = None
+        value = _get_array(api.GetDoubleArray(object_type, object_name, attribute_name), float_dtype,
+                           dtypes.numpy_arrays)
     elif datatype == 'string':
         value = api.GetStringValue(object_type, object_name, attribute_name)
     elif datatype == 'xy':
         ref = api.GetXyCurveReference(object_type, object_name, attribute_name)
-        x = np.fromiter(api.GetXyCurveX(object_type, object_name, attribute_name), float)
-        y = np.fromiter(api.GetXyCurveY(object_type, object_name, attribute_name), float)
+        x = np.fromiter(api.GetXyCurveX(object_type, object_name, attribute_name), float_dtype)
+        y = np.fromiter(api.GetXyCurveY(object_type, object_name, attribute_name), float_dtype)
         if x.size == 0:
             value = None
         else:
@@ -37,9 +68,9 @@ def get_attribute_value(api, object_name, object_type, attribute_name, datatype,
                 value = dict(ref=ref, xy=xy)
     elif datatype == 'xy_array':
         refs = np.fromiter(api.GetXyCurveArrayReferences(object_type, object_name, attribute_name), float)
-        n = np.fromiter(api.GetXyCurveArrayNPoints(object_type, object_name, attribute_name), int)
-        x = np.fromiter(api.GetXyCurveArrayX(object_type, object_name, attribute_name), float)
-        y = np.fromiter(api.GetXyCurveArrayY(object_type, object_name, attribute_name), float)
+        n = np.fromiter(api.GetXyCurveArrayNPoints(object_type, object_name, attribute_name), dtypes.int_dtype)
+        x = np.fromiter(api.GetXyCurveArrayX(object_type, object_name, attribute_name), float_dtype)
+        y = np.fromiter(api.GetXyCurveArrayY(object_type, object_name, attribute_name), float_dtype)
         value = []
         offset = 0
         if n.size == 0:
@@ -59,7 +90,7 @@ def get_attribute_value(api, object_name, object_type, attribute_name, datatype,
     elif datatype == 'xyt':
         start = get_api_datetime(api.GetStartTime())
         end = get_api_datetime(api.GetEndTime())
-        value = get_xyt_attribute(api, object_name, object_type, attribute_name, start, end, dataframe)
+        value = get_xyt_attribute(api, object_name, object_type, attribute_name, start, end, dataframe, dtypes)
     elif datatype == 'txy' or datatype == 'txy_stochastic':
         start_time = api.GetTxySeriesStartTime(object_type, object_name, attribute_name)
         if start_time:
@@ -72,10 +103,10 @@ def get_attribute_value(api, object_name, object_type, attribute_name, datatype,
             if not isinstance(t, np.ndarray):
                 t = np.fromiter(t, int)
             if not isinstance(y, np.ndarray):
-                y = np.fromiter(y, float)
-            assert time_unit == 'hour', 'unexpected time unit encountered'
-            delta = pd.Timedelta(hours=1)
-            t = start_time + t * delta
+                y = np.fromiter(y, float_dtype)
+            else:
+                y = y.astype(float_dtype, copy=False)
+            t = get_datetimes_from_offsets(start_time, t, time_unit)
             if y.size > t.size:  # Stochastic
                 value = pd.DataFrame(data=y, index=t)
             else:
@@ -87,17 +118,17 @@ def get_attribute_value(api, object_name, object_type, attribute_name, datatype,
     return value
 
 
-def get_xyt_attribute(api, object_name, object_type, attribute_name, start, end, dataframe=True):
+def get_xyt_attribute(api, object_name, object_type, attribute_name, start, end, dataframe=True, dtypes=None):
+    dtypes = dtypes or DEFAULT_DTYPES
     # Get time delta from time unit
     unit = api.GetTimeUnit()
-    delta = pd.Timedelta(minutes=1)
     resolution = api.GetTimeResolutionY()[0]
-    if unit == 'hour':
-        delta = pd.Timedelta(hours=1)
-    elif unit == 'second':
-        delta = pd.Timedelta(seconds=1)
+    if unit == 'second':
         print('WARNING: Xyt series are not supported when the time unit is set to "second". '
               'This will likely not work as intended')
+    elif unit != 'hour':
+        unit = 'minute'
+    delta = pd.Timedelta(get_time_unit_ns(unit), unit='ns')
 
     # Identify the indices that should be extracted from the xyt series
     shop_start_time = get_api_datetime(api.GetStartTime())
@@ -115,18 +146,15 @@ def get_xyt_attribute(api, object_name, object_type, attribute_name, start, end,
 
     # This is only needed if it is possible to have missing time steps in the XyT curve, otherwise it can be
     # replaced by a simple range
-    xyt_time_indices = api.GetXyTCurveTimes(object_type, object_name, attribute_name)
-    time_list = []
-    for xyt_time_index in xyt_time_indices:
-        if min_time_index <= xyt_time_index <= max_time_index:
-            time_list.append(shop_start_time + xyt_time_index*delta*resolution)
-
-    x = np.fromiter(api.GetXyTCurveX(object_type, object_name, attribute_name,
-                                          get_api_timestring(start), get_api_timestring(end)), float)
-    y = np.fromiter(api.GetXyTCurveY(object_type, object_name, attribute_name,
-                                          get_api_timestring(start), get_api_timestring(end)), float)
-    n = np.fromiter(api.GetXyTCurveN(object_type, object_name, attribute_name,
-                                          get_api_timestring(start), get_api_timestring(end)), int)
+    xyt_time_indices = np.asarray(api.GetXyTCurveTimes(object_type, object_name, attribute_name), dtype=np.int64)
+    xyt_time_indices = xyt_time_indices[(min_time_index <= xyt_time_indices) & (xyt_time_indices <= max_time_index)]
+    time_list = get_datetimes_from_offsets(shop_start_time, xyt_time_indices * resolution, unit)
+
+    api_start = get_api_timestring(start)
+    api_end = get_api_timestring(end)
+    x = np.fromiter(api.GetXyTCurveX(object_type, object_name, attribute_name, api_start, api_end), dtypes.float_dtype)
+    y = np.fromiter(api.GetXyTCurveY(object_type, object_name, attribute_name, api_start, api_end), dtypes.float_dtype)
+    n = np.fromiter(api.GetXyTCurveN(object_type, object_name, attribute_name, api_start, api_end), dtypes.int_dtype)
     value = []
     offset = 0
     if n.size == 0:
@@ -227,21 +255,36 @@ def set_attribute(api, object_name, object_type, attribute_name, datatype, value
 
         txy_start_time = api.GetStartTime()
 
+        # Offsets in the time unit of the core, for all timestamps at once. Timestamps that are not a whole number of
+        # time units from the start raise a ValueError
         start_timestamp = get_api_datetime(txy_start_time)
-        diff_time = value.index - start_timestamp
-        int_hours = diff_time.seconds // 3600  # time differences < 1h are cut off!
-        float_hours = diff_time.seconds / 3600.
-        assert max(float_hours - int_hours) < 1./3600, 'all time intervals must be given in full hours'
-        int_hours = int_hours + diff_time.days * 24
-        if len(int_hours)>1:
-            assert min(int_hours.to_numpy()[1:]-int_hours.to_numpy()[:len(int_hours)-1])>0, 'non-positive time interval in TXY series'
+        offsets = get_offsets_from_datetimes(start_timestamp, value.index, api.GetTimeUnit())
+        if len(offsets)>1:
+            assert (np.diff(offsets) > 0).all(), 'non-positive time interval in TXY series'
 
         api.SetTxySeries(
             object_type,
             object_name,
             attribute_name,
             txy_start_time,
-            int_hours.to_numpy(), #value.index.astype(int),
+            offsets,
             np.asfortranarray(value.values),
         )
 
+
+
+def get_attribute_datatypes(api, object_type, datatypes=None, direction=None):
+    # Map attribute names of an object type to datatypes, optionally filtered on datatype and on direction ("input" or
+    # "output") as given by the isInput/isOutput attribute info
+    attribute_datatypes = {}
+    for attribute_name, datatype in zip(api.GetObjectTypeAttributeNames(object_type),
+                                        api.GetObjectTypeAttributeDatatypes(object_type)):
+        if datatypes is not None and datatype not in datatypes:
+            continue
+        if direction == 'input' and str(api.GetAttributeInfo(object_type, attribute_name, 'isInput')).lower() != 'true':
+            continue
+        if direction == 'output' and \
+                str(api.GetAttributeInfo(object_type, attribute_name, 'isOutput')).lower() != 'true':
+            continue
+        attribute_datatypes[attribute_name] = datatype
+    return attribute_datatypes
@@ -0,0 +1,162 @@
+import numpy as np
+import pandas as pd
+
+# Comparison of the results of two runs, given as model states (see model_state.py), e.g. from get_results, a RunCache
+# or a FileBroker result. Values are compared per object type and attribute: the values of all objects with the same
+# shape in both results are concatenated, and the comparison is done once on the whole arrays. The comparison is done on
+# first use and kept, so the summary, equal and iter_differences share it.
+
+_SUMMARY_COLUMNS = ['n_objects', 'n_values', 'n_different', 'max_abs_delta', 'mean_abs_delta', 'n_mismatched']
+
+
+def _get_results(source):
+    # Sessions are compared by their results, anything else is taken to be a model state
+    if hasattr(source, 'get_results'):
+        return source.get_results()
+    return source
+
+
+def _index_results(results):
+    values = {}
+    for object_type, object_name, attributes in results:
+        for attribute_name, (datatype, value) in attributes.items():
+            values[(object_type, object_name, attribute_name)] = value
+    return values
+
+
+def _get_array(value):
+    # Values as a 2d float array with one row per index item, and the index (time, x or position), or None for values
+    # that are not numeric
+    if isinstance(value, (pd.Series, pd.DataFrame)):
+        return np.asarray(value.values, dtype=np.float64).reshape(len(value), -1), value.index
+    if isinstance(value, str):
+        return None, None
+    if isinstance(value, list) and value and isinstance(value[0], (pd.Series, pd.DataFrame, dict)):
+        return None, None
+    array = np.asarray(value, dtype=np.float64).reshape(-1, 1)
+    return array, pd.RangeIndex(len(array))
+
+
+def _equal(value_a, value_b):
+    if isinstance(value_a, (pd.Series, pd.DataFrame)):
+        return isinstance(value_b, type(value_a)) and value_a.equals(value_b)
+    if isinstance(value_a, list):
+        return isinstance(value_b, list) and len(value_a) == len(value_b) and \
+            all(_equal(a, b) for a, b in zip(value_a, value_b))
+    return value_a == value_b
+
+
+class ResultDiff(object):
+
+    def __init__(self, a, b, rtol=1e-9, atol=0.0):
+        """
+            Parameters
+            ----------
+            a, b: [ProdriskSession] or model states from get_results to compare
+            rtol, atol: [float] values are equal when abs(a - b) <= atol + rtol*abs(b), as in numpy.isclose. NaN
+                values are equal to each other
+        """
+        self._rtol = rtol
+        self._atol = atol
+        values_a = _index_results(_get_results(a))
+        values_b = _index_results(_get_results(b))
+
+        # Objects and attributes found in only one of the results
+        self.missing = [key + ('b',) for key in values_a if key not in values_b] + \
+                       [key + ('a',) for key in values_b if key not in values_a]
+
+        # Keys grouped per object type and attribute, with the values of both sides
+        self._groups = {}
+        for key, value_a in values_a.items():
+            if key in values_b:
+                self._groups.setdefault((key[0], key[2]), []).append((key[1], value_a, values_b[key]))
+        self._comparisons = None
+
+    def _compare_group(self, items):
+        # Concatenated values of the objects with matching shapes, the objects with mismatching shape, index or
+        # non-numeric values, and the offsets and shapes of each compared object
+        arrays_a, arrays_b, compared, mismatched = [], [], [], []
+        for object_name, value_a, value_b in items:
+            array_a, index_a = _get_array(value_a)
+            array_b, index_b = _get_array(value_b)
+            if array_a is None or array_b is None:
+                if array_a is not None or array_b is not None or not _equal(value_a, value_b):
+                    mismatched.append(object_name)
+            elif array_a.shape != array_b.shape or not index_a.equals(index_b):
+                mismatched.append(object_name)
+            else:
+                arrays_a.append(array_a.ravel())
+                arrays_b.append(array_b.ravel())
+                compared.append((object_name, index_a, array_a.shape[1]))
+        if compared:
+            a = np.concatenate(arrays_a)
+            b = np.concatenate(arrays_b)
+        else:
+            a = b = np.empty(0)
+        offsets = np.cumsum([0] + [len(array) for array in arrays_a])
+        return a, b, compared, offsets, mismatched
+
+    def _get_delta(self, a, b):
+        delta = np.abs(a - b)
+        different = delta > self._atol + self._rtol * np.abs(b)
+        both_nan = np.isnan(a) & np.isnan(b)
+        different = (different | (np.isnan(a) != np.isnan(b))) & ~both_nan
+        return np.where(both_nan, 0.0, delta), different
+
+    def _get_comparisons(self):
+        # Per object type and attribute: the concatenated values, compared objects, offsets, mismatched objects,
+        # absolute deltas and the mask of values outside the tolerances
+        if self._comparisons is None:
+            comparisons = []
+            for (object_type, attribute_name), items in self._groups.items():
+                a, b, compared, offsets, mismatched = self._compare_group(items)
+                delta, different = self._get_delta(a, b)
+                comparisons.append((object_type, attribute_name, a, b, compared, offsets, mismatched, delta,
+                                    different))
+            self._comparisons = comparisons
+        return self._comparisons
+
+    def summary(self):
+        """
+            Returns
+            -------
+            [pandas.DataFrame] indexed by object_type and attribute_name, with the number of objects and values
+            compared, the number of values outside the tolerances, the max and mean absolute deltas and the number of
+            objects that could not be compared value by value because their shape, index or non-numeric value differ
+        """
+        rows = []
+        for object_type, attribute_name, a, _, compared, _, mismatched, delta, different in self._get_comparisons():
+            finite = delta[np.isfinite(delta)]
+            rows.append((object_type, attribute_name, len(compared), a.size, int(different.sum()),
+                         finite.max() if finite.size else 0.0, finite.mean() if finite.size else 0.0,
+                         len(mismatched)))
+        index = pd.MultiIndex.from_tuples([row[:2] for row in rows], names=['object_type', 'attribute_name'])
+        return pd.DataFrame([row[2:] for row in rows], index=index, columns=_SUMMARY_COLUMNS)
+
+    @property
+    def equal(self):
+        if self.missing:
+            return False
+        return not any(mismatched or different.any() for _, _, _, _, _, _, mismatched, _, different
+                       in self._get_comparisons())
+
+    def iter_differences(self):
+        """
+            Yield the differences one at a time, so that large result sets can be inspected without building a list
+            of all of them. Each difference is a dict with object_type, object_name, attribute_name, index (time, x or
+            array position), column (scenario), a, b and delta. Objects that could not be compared value by value are
+            given with index, column, a, b and delta set to None.
+        """
+        for object_type, attribute_name, a, b, compared, offsets, mismatched, delta, different in \
+                self._get_comparisons():
+            for object_name in mismatched:
+                yield {'object_type': object_type, 'object_name': object_name, 'attribute_name': attribute_name,
+                       'index': None, 'column': None, 'a': None, 'b': None, 'delta': None}
+            positions = np.flatnonzero(different)
+            objects = np.searchsorted(offsets, positions, side='right') - 1
+            for position, i in zip(positions, objects):
+                object_name, index, n_columns = compared[i]
+                row, column = divmod(int(position - offsets[i]), n_columns)
+                yield {'object_type': object_type, 'object_name': object_name, 'attribute_name': attribute_name,
+                       'index': index[row], 'column': column, 'a': a[position], 'b': b[position],
+                       'delta': delta[position]}
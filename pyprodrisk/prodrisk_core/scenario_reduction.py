@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+
+from ..prodrisk_core.prodrisk_api import get_attribute_value, get_attribute_datatypes, set_attribute
+
+
+def get_stochastic_inputs(api, n_scenarios):
+    # Collect all txy_stochastic input series in the system, which must have one column per scenario
+    object_names = api.GetObjectNamesInSystem()
+    object_types = api.GetObjectTypesInSystem()
+    datatypes = {}
+    series = {}
+    for object_name, object_type in zip(object_names, object_types):
+        if object_type not in datatypes:
+            datatypes[object_type] = get_attribute_datatypes(api, object_type, ['txy_stochastic'], 'input')
+        for attribute_name in datatypes[object_type]:
+            value = get_attribute_value(api, object_name, object_type, attribute_name, 'txy_stochastic')
+            if not isinstance(value, pd.DataFrame):
+                continue
+            if value.shape[1] != n_scenarios:
+                raise ValueError(f'{object_type} {object_name} {attribute_name} has {value.shape[1]} scenarios, '
+                                 f'expected {n_scenarios}')
+            series[(object_type, object_name, attribute_name)] = value
+    return series
+
+
+def get_scenario_features(series):
+    # One row per scenario with all series stacked. Each series is standardized, so that series with large values
+    # (e.g. inflow in m3/s compared to price in EUR/MWh) do not dominate the distance between scenarios
+    features = []
+    for value in series.values():
+        y = value.to_numpy(dtype=float).T
+        std = y.std()
+        features.append((y - y.mean()) / (std if std > 0 else 1.0))
+    return np.hstack(features)
+
+
+def fast_forward_selection(features, n_selected, probabilities=None):
+    """
+        Select a subset of scenarios by fast forward selection (Heitsch and Roemisch, 2003), minimizing the
+        Kantorovich distance between the original and the reduced scenario distribution.
+
+        Parameters
+        ----------
+        features: [numpy.ndarray] one row per scenario
+        n_selected: [integer] number of scenarios to keep
+        probabilities: [numpy.ndarray] probability of each scenario, defaults to equiprobable scenarios
+
+        Returns
+        -------
+        selected: [numpy.ndarray] indices of the selected scenarios, in order of selection
+        weights: [numpy.ndarray] probability of each selected scenario
+        distance: [float] Kantorovich distance between the original and the reduced distribution
+    """
+    n_scenarios = features.shape[0]
+    if not 0 < n_selected <= n_scenarios:
+        raise ValueError(f'Number of selected scenarios must be between 1 and {n_scenarios}')
+    if probabilities is None:
+        probabilities = np.full(n_scenarios, 1.0 / n_scenarios)
+
+    squared_norms = (features ** 2).sum(axis=1)
+    squared_distances = squared_norms[:, None] + squared_norms[None, :] - 2 * features @ features.T
+    distances = np.sqrt(np.maximum(squared_distances, 0.0))
+    np.fill_diagonal(distances, 0.0)
+
+    # z[k, u] is the distance from scenario k to the closest of the selected scenarios and scenario u
+    z = distances.copy()
+    is_selected = np.zeros(n_scenarios, dtype=bool)
+    selected = []
+    for _ in range(n_selected):
+        cost = probabilities @ z
+        cost[is_selected] = np.inf
+        u = int(np.argmin(cost))
+        selected.append(u)
+        is_selected[u] = True
+        z = np.minimum(z, z[:, [u]])
+
+    selected = np.array(selected)
+    # Redistribute the probability of each removed scenario to the closest selected scenario
+    closest = np.argmin(distances[:, selected], axis=1)
+    weights = np.bincount(closest, weights=probabilities, minlength=n_selected)
+    distance = float(probabilities @ distances[np.arange(n_scenarios), selected[closest]])
+    return selected, weights, distance
+
+
+def get_moment_errors(series, selected, weights):
+    # Error in the mean and standard deviation of each series over all time steps, when using the reduced scenario set
+    # with the given weights instead of the full set
+    errors = {}
+    for key, value in series.items():
+        y = value.to_numpy(dtype=float)
+        mean = y.mean(axis=1)
+        std = y.std(axis=1)
+        reduced = y[:, selected]
+        reduced_mean = reduced @ weights
+        reduced_std = np.sqrt(((reduced - reduced_mean[:, None]) ** 2) @ weights)
+        scale = np.abs(mean).mean()
+        errors[key] = {
+            'mean_error': np.abs(reduced_mean - mean).mean() / (scale if scale > 0 else 1.0),
+            'std_error': np.abs(reduced_std - std).mean() / (std.mean() if std.mean() > 0 else 1.0),
+        }
+    moment_errors = pd.DataFrame.from_dict(errors, orient='index')
+    moment_errors.index.names = ['object_type', 'object_name', 'attribute_name']
+    return moment_errors
+
+
+def reduce_scenarios(api, n_scenarios, n_selected, apply=True):
+    series = get_stochastic_inputs(api, n_scenarios)
+    if not series:
+        raise ValueError(f'Found no txy_stochastic input with {n_scenarios} scenarios to reduce')
+    selected, weights, distance = fast_forward_selection(get_scenario_features(series), n_selected)
+
+    if apply:
+        for (object_type, object_name, attribute_name), value in series.items():
+            reduced = value.iloc[:, selected]
+            reduced.columns = range(n_selected)
+            set_attribute(api, object_name, object_type, attribute_name, 'txy_stochastic', reduced)
+
+    # ProdRisk treats all scenarios as equiprobable, so the errors of the applied set are given with equal weights.
+    # The errors with the redistributed weights show what a weighted use of the selected scenarios would give
+    return {
+        'selected': selected,
+        'weights': weights,
+        'distance': distance,
+        'moment_errors': get_moment_errors(series, selected, np.full(n_selected, 1.0 / n_selected)),
+        'weighted_moment_errors': get_moment_errors(series, selected, weights),
+    }
@@ -0,0 +1,123 @@
+import numpy as np
+
+# Module topology is given as [plant discharge to, bypass to, spill to], and pump topology as
+# [pump number, upper module, lower module], all as module numbers where 0 means no connection.
+MODULE_CONNECTIONS = ['plant', 'bypass', 'spill']
+
+
+class ModuleTopology(object):
+
+    # Module and pump connections of a system, read in a single pass over the objects. Modules are identified by their
+    # index in module_names, edges are given as arrays of module indices.
+
+    def __init__(self, api):
+        self.module_names = []
+        self.module_numbers = []
+        self.pump_names = []
+        self.dangling = []
+
+        module_topologies = []
+        pump_topologies = []
+        for object_name, object_type in zip(api.GetObjectNamesInSystem(), api.GetObjectTypesInSystem()):
+            if object_type == 'module':
+                self.module_names.append(object_name)
+                number = api.GetIntValue('module', object_name, 'number')
+                self.module_numbers.append(number)
+                module_topologies.append(_pad(api.GetIntArray('module', object_name, 'topology'), 3))
+            elif object_type == 'pump':
+                self.pump_names.append(object_name)
+                pump_topologies.append(_pad(api.GetIntArray('pump', object_name, 'topology'), 3))
+
+        self.module_numbers = np.array(self.module_numbers, dtype=np.int64)
+        module_topologies = np.array(module_topologies, dtype=np.int64).reshape(-1, 3)
+        pump_topologies = np.array(pump_topologies, dtype=np.int64).reshape(-1, 3)
+
+        # Waterways from each module to the modules downstream
+        sources, kinds = np.nonzero(module_topologies > 0)
+        targets = self._get_module_indices(module_topologies[sources, kinds])
+        for source, kind, target in zip(sources, kinds, targets):
+            if target < 0:
+                self.dangling.append(('module', self.module_names[source], MODULE_CONNECTIONS[kind],
+                                      int(module_topologies[source, kind])))
+        valid = targets >= 0
+        self.edges = np.stack([sources[valid], targets[valid]], axis=1)
+        self.edge_kinds = kinds[valid]
+
+        # Pumps connect the lower and upper module of the pump
+        pump_edges = []
+        pump_modules = []
+        for i, topology in enumerate(pump_topologies):
+            upper, lower = self._get_module_indices(topology[1:3])
+            pump_modules.append((upper, lower))
+            for connection, number, index in [('upper', topology[1], upper), ('lower', topology[2], lower)]:
+                if number > 0 and index < 0:
+                    self.dangling.append(('pump', self.pump_names[i], connection, int(number)))
+            if upper >= 0 and lower >= 0:
+                pump_edges.append((lower, upper))
+        self.pump_edges = np.array(pump_edges, dtype=np.int64).reshape(-1, 2)
+        # Upper and lower module index of each pump, -1 for missing modules
+        self.pump_modules = np.array(pump_modules, dtype=np.int64).reshape(-1, 2)
+
+    @property
+    def n_modules(self):
+        return len(self.module_names)
+
+    def _get_module_indices(self, numbers):
+        # Index of the module with each given number, -1 where no module has the number
+        numbers = np.asarray(numbers, dtype=np.int64)
+        if self.module_numbers.size == 0:
+            return np.full(numbers.shape, -1, dtype=np.int64)
+        order = np.argsort(self.module_numbers, kind='stable')
+        sorted_numbers = self.module_numbers[order]
+        positions = np.clip(np.searchsorted(sorted_numbers, numbers), 0, len(order) - 1)
+        found = sorted_numbers[positions] == numbers
+        return np.where(found, order[positions], -1)
+
+    def get_duplicate_numbers(self):
+        numbers, counts = np.unique(self.module_numbers, return_counts=True)
+        return numbers[counts > 1].tolist()
+
+    def find_cycles(self):
+        # Modules on a cycle of waterways or downstream of one, found by repeatedly removing modules without upstream
+        # modules (Kahn's algorithm). Pumps are left out, as they move water upstream by design.
+        in_degree = np.bincount(self.edges[:, 1], minlength=self.n_modules)
+        downstream = [[] for _ in range(self.n_modules)]
+        for source, target in self.edges:
+            downstream[source].append(target)
+        stack = list(np.flatnonzero(in_degree == 0))
+        while stack:
+            module = stack.pop()
+            for target in downstream[module]:
+                in_degree[target] -= 1
+                if in_degree[target] == 0:
+                    stack.append(target)
+        return [self.module_names[i] for i in np.flatnonzero(in_degree > 0)]
+
+    def get_component_labels(self):
+        # Label of the connected component of each module, where modules connected by waterways or pumps in either
+        # direction share a label. Labels are the index of the first module of each component
+        parent = np.arange(self.n_modules)
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for a, b in np.concatenate([self.edges, self.pump_edges]):
+            root_a, root_b = find(a), find(b)
+            if root_a != root_b:
+                parent[max(root_a, root_b)] = min(root_a, root_b)
+        return np.array([find(i) for i in range(self.n_modules)], dtype=np.int64)
+
+    def get_components(self):
+        # Module indices of each connected component, ordered by the first module of the components
+        labels = self.get_component_labels()
+        order = np.argsort(labels, kind='stable')
+        splits = np.flatnonzero(np.diff(labels[order])) + 1
+        return [component.tolist() for component in np.split(order, splits)] if self.n_modules else []
+
+
+def _pad(values, length):
+    values = list(values)[:length]
+    return values + [0] * (length - len(values))
@@ -0,0 +1,109 @@
+from collections import namedtuple
+
+import numpy as np
+
+from ..helpers.time import get_api_datetime, get_api_datetimes, get_time_unit_ns
+from ..prodrisk_core.prodrisk_api import get_attribute_datatypes
+from ..prodrisk_core.topology import ModuleTopology
+
+ValidationProblem = namedtuple('ValidationProblem',
+                               ['severity', 'object_type', 'object_name', 'attribute_name', 'message'])
+
+
+def validate_model(api, n_scenarios):
+    """
+        Check the model for errors that would otherwise only be found by GenerateProdriskFiles or RunProdrisk.
+
+        Returns
+        -------
+        [list] of ValidationProblem with severity "error" or "warning"
+    """
+    problems = []
+    start = api.GetStartTime()
+    if not start:
+        problems.append(ValidationProblem('error', '', '', '', 'The optimization period has not been set'))
+    problems += _validate_txy_series(api, start, n_scenarios)
+    problems += _validate_topology(api)
+    return problems
+
+
+def _validate_txy_series(api, start, n_scenarios):
+    problems = []
+    time_unit = api.GetTimeUnit()
+    unit_ns = get_time_unit_ns(time_unit)
+
+    # ProdRisk models have hourly resolution, also when the core time unit is minute or second
+    hour_ns = get_time_unit_ns('hour')
+
+    # Collect the start time, first offset and whether any step is not whole hours for all txy inputs first, the
+    # checks are then done on whole arrays
+    keys = []
+    off_grid_steps = []
+    series_starts = []
+    first_offsets = []
+    n_columns = []
+    datatypes = {}
+    for object_name, object_type in zip(api.GetObjectNamesInSystem(), api.GetObjectTypesInSystem()):
+        if object_type not in datatypes:
+            datatypes[object_type] = get_attribute_datatypes(api, object_type, ['txy', 'txy_stochastic'], 'input')
+        for attribute_name, datatype in datatypes[object_type].items():
+            series_start = api.GetTxySeriesStartTime(object_type, object_name, attribute_name)
+            if not series_start:
+                continue
+            t = np.asarray(api.GetTxySeriesT(object_type, object_name, attribute_name), dtype=np.int64)
+            y = np.asarray(api.GetTxySeriesY(object_type, object_name, attribute_name))
+            steps = np.diff(t)
+            if (steps <= 0).any():
+                problems.append(ValidationProblem('error', object_type, object_name, attribute_name,
+                                                  'Non-positive time interval in TXY series'))
+            keys.append((object_type, object_name, attribute_name, datatype))
+            series_starts.append(series_start[0:14])
+            first_offsets.append(t[0] if t.size else 0)
+            off_grid_steps.append(bool((steps * unit_ns % hour_ns).any()))
+            n_columns.append(y.shape[1] if y.ndim > 1 else 1)
+
+    if not keys:
+        return problems
+
+    series_starts = get_api_datetimes(series_starts).values.astype('datetime64[ns]').astype(np.int64)
+    first_times = series_starts + np.array(first_offsets, dtype=np.int64) * unit_ns
+    n_columns = np.array(n_columns)
+
+    if start:
+        start_ns = get_api_datetime(start).value
+        for i in np.flatnonzero(first_times > start_ns):
+            object_type, object_name, attribute_name, _ = keys[i]
+            problems.append(ValidationProblem('error', object_type, object_name, attribute_name,
+                                              'TXY series does not cover the start of the optimization period'))
+
+    # The start and all steps must be whole hours, so that every point of the series is on the hour
+    for i in np.flatnonzero((first_times % hour_ns != 0) | np.array(off_grid_steps)):
+        object_type, object_name, attribute_name, _ = keys[i]
+        problems.append(ValidationProblem('error', object_type, object_name, attribute_name,
+                                          'TXY series is not given in whole hours'))
+
+    is_stochastic = np.array([key[3] == 'txy_stochastic' for key in keys])
+    for i in np.flatnonzero(is_stochastic & (n_columns != n_scenarios) & (n_columns != 1)):
+        object_type, object_name, attribute_name, _ = keys[i]
+        problems.append(ValidationProblem('error', object_type, object_name, attribute_name,
+                                          f'Stochastic TXY series has {n_columns[i]} scenarios, expected '
+                                          f'{n_scenarios}'))
+    return problems
+
+
+def _validate_topology(api):
+    problems = []
+    topology = ModuleTopology(api)
+    for object_type, object_name, connection, number in topology.dangling:
+        problems.append(ValidationProblem('error', object_type, object_name, 'topology',
+                                          f'The {connection} connection refers to module number {number}, which '
+                                          f'does not exist'))
+    for number in topology.get_duplicate_numbers():
+        names = [name for name, n in zip(topology.module_names, topology.module_numbers) if n == number]
+        for name in names:
+            problems.append(ValidationProblem('error', 'module', name, 'number',
+                                              f'Module number {number} is used by {len(names)} modules'))
+    for name in topology.find_cycles():
+        problems.append(ValidationProblem('error', 'module', name, 'topology',
+                                          'Module is on or below a cycle in the waterways'))
+    return problems
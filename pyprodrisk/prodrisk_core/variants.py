@@ -0,0 +1,67 @@
+from contextlib import contextmanager
+
+from ..prodrisk_core.prodrisk_api import get_attribute_value, set_attribute
+
+# Model variants are expressed as overrides of single attributes on a base model, given as a dict mapping
+# (object_type, object_name, attribute_name) to the value of the variant. Applying the overrides returns the previous
+# values, which is the diff needed to get back to the base model, so a model is built once and reused for any number
+# of variants.
+
+
+def _get_datatype(api, object_type, attribute_name):
+    for name, datatype in zip(api.GetObjectTypeAttributeNames(object_type),
+                              api.GetObjectTypeAttributeDatatypes(object_type)):
+        if name == attribute_name:
+            return datatype
+    raise ValueError(f'Unknown attribute: "{attribute_name}" for object type "{object_type}"')
+
+
+def apply_overrides(api, overrides):
+    """
+        Set the attributes of the overrides, after checking that all of them are set in the current model.
+
+        Parameters
+        ----------
+        api: ProdRisk core
+        overrides: [dict] (object_type, object_name, attribute_name) to value
+
+        Returns
+        -------
+        [dict] (object_type, object_name, attribute_name) to the previous value, that reverts the overrides when applied
+    """
+    previous = {}
+    datatypes = {}
+    for key in overrides:
+        object_type, object_name, attribute_name = key
+        datatype = _get_datatype(api, object_type, attribute_name)
+        # Previous values are read with the default dtypes, so that reverting restores them exactly
+        value = get_attribute_value(api, object_name, object_type, attribute_name, datatype)
+        if value is None:
+            raise ValueError(f'{object_type} {object_name} {attribute_name} is not set in the base model, and can not '
+                             f'be reverted after being overridden')
+        previous[key] = value
+        datatypes[key] = datatype
+
+    applied = []
+    try:
+        for key, value in overrides.items():
+            object_type, object_name, attribute_name = key
+            applied.append(key)
+            set_attribute(api, object_name, object_type, attribute_name, datatypes[key], value)
+    except Exception:
+        # Restore the previous values, so that a failed set does not leave the model partly overridden
+        for key in reversed(applied):
+            object_type, object_name, attribute_name = key
+            set_attribute(api, object_name, object_type, attribute_name, datatypes[key], previous[key])
+        raise
+    return previous
+
+
+@contextmanager
+def overridden(api, overrides):
+    # Apply overrides for the duration of the with block
+    previous = apply_overrides(api, overrides)
+    try:
+        yield previous
+    finally:
+        apply_overrides(api, previous)
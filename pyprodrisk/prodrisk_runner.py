@@ -3,9 +3,31 @@ import sys
 import pandas as pd
 import numpy as np
 import re
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 
 from .prodrisk_core.model_builder import ModelBuilderType
+from .prodrisk_core.command_builder import CommandBuilder
+from .prodrisk_core.prodrisk_api import set_attribute, get_attribute_value, get_attribute_datatypes, \
+    get_dtype_policy
+from .prodrisk_core.scenario_reduction import reduce_scenarios
+from .prodrisk_core.model_state import get_model_state, set_model_state, get_state_hash
+from .prodrisk_core.validation import validate_model
+from .prodrisk_core.variants import apply_overrides
+from .prodrisk_core.decomposition import get_watercourses, decompose_model_state, merge_results, \
+    get_decomposed_summary
+from .prodrisk_core.result_diff import ResultDiff
+from .prodrisk_core.locked_api import LockedApi
+from .prodrisk_core.arrow_export import get_scalar_table, get_txy_table, export_attributes
 from .helpers.time import get_api_datetime, get_api_timestring
+from .helpers.scenarios import iter_scenario_file, read_scenarios
+from .helpers.log_monitor import LogMonitor
+from .helpers.resources import ResourceMonitor, append_metrics
+from .sweep import run_sweep
+from .rolling_horizon import run_rolling_horizon
+
+_settings_cache = {}
+
 
 def _camel_to_snake(name):
     name = re.sub('(.)([A-Z][a-z]+)', r'\1_\2', name)
@@ -22,49 +44,100 @@ class ProdriskSession(object):
 
     # Class for handling a Prodrisk session through the python API.
 
-    def __init__(self, license_path='', silent=True, log_file='', solver_path='', suppress_log=False, log_gets=True):
+    def __init__(self, license_path='', silent=True, log_file='', solver_path='', suppress_log=False, log_gets=True,
+                 session_id='', thread_safe=False, result_dtypes=None):
 
         self._n_scenarios = 1
+        self._start_time = None
+        self._end_time = None
+        self._n_weeks = None
         self._license_path = license_path
         self._silent_console = silent
         self._silent_log = suppress_log
         self._keep_working_directory = False
+        self._log_file = log_file
+        self._thread_safe = thread_safe
+        self._result_dtypes = get_dtype_policy(result_dtypes)
+        self._run_cache = None
+        self._run_summary = None
+        self._run_resources = None
+        self._working_directory = None
+        self._metrics_file = None
 
         if license_path:
             os.environ['LTM_LICENSE_CONTROL_SYSTEM'] = 'TRUE'
             os.environ['LTM_LICENSE_FILE'] = 'LTM_License.dat' #TODO: cleverly search for LTM_Lice*.dat 
             os.environ['LTM_LICENSE_PATH'] = license_path
             
-        # Insert either the solver_path or the LTM_LICENSE_PATH to sys.path to find prodrisk_pybind.pyd
-        
+        # Insert either the solver_path or the LTM_LICENSE_PATH to sys.path to find prodrisk_pybind.pyd.
+        # Only insert once, sys.path would otherwise grow with every session created by long running processes
         if solver_path:
             solver_path = os.path.abspath(solver_path)
-            sys.path.insert(1, solver_path)
         else:
-            sys.path.insert(1, os.environ['LTM_LICENSE_PATH'])
+            solver_path = os.environ['LTM_LICENSE_PATH']
+        if solver_path not in sys.path:
+            sys.path.insert(1, solver_path)
 
         import prodrisk_pybind as pb
+        self._pb = pb
 
-        self._session_id = "session_" + pd.Timestamp("now").strftime("%Y-%m-%d-%H-%M-%S")
+        if session_id:
+            self._session_id = session_id
+        else:
+            # The session id names the working directory of the session, so it must be unique also for sessions
+            # created within the same second, e.g. by parallel workers
+            self._session_id = "session_" + pd.Timestamp("now").strftime("%Y-%m-%d-%H-%M-%S") + "_" + \
+                uuid.uuid4().hex[:8]
+
+        self._create_core()
+
+        # default settings
+        self.prodrisk_path = "C:/PRODRISK/ltm_core_bin/"
+        self.mpi_path = "C:/Program Files/Microsoft MPI/Bin"
+        self.use_coin_osi = True
 
+    def _create_core(self):
         # ProdriskSess(<session_id>, <silentConsoleOutput>, <filePath>)
-        if len(log_file) != 0:
-            self._pb_api = pb.ProdriskCore(self.session_id, self._silent_console, log_file)
+        if len(self._log_file) != 0:
+            self._pb_api = self._pb.ProdriskCore(self.session_id, self._silent_console, self._log_file)
         else:
-            self._pb_api = pb.ProdriskCore(self.session_id, self._silent_console)
+            self._pb_api = self._pb.ProdriskCore(self.session_id, self._silent_console)
+        if self._thread_safe:
+            self._pb_api = LockedApi(self._pb_api)
 
         self._pb_api.KeepWorkingDirectory(self._keep_working_directory)  # The Prodrisk directory for the current session will be kept. The folder is found under prodrisk.prodrisk_path
 
-        self.model = ModelBuilderType(self._pb_api, ignores=['setting'])
+        self.model = ModelBuilderType(self._pb_api, ignores=['setting'], dtypes=self._result_dtypes)
         self._model = ModelBuilderType(self._pb_api)
         self._setting = self._model.setting.add_object('setting')
 
-        # default settings
-        self._settings = {_camel_to_snake(atr): atr for atr in dir(self._setting) if atr[0] != '_'}
+        # The settings map only depends on the binding, and is shared by all sessions using it
+        if self._pb not in _settings_cache:
+            _settings_cache[self._pb] = {_camel_to_snake(atr): atr for atr in dir(self._setting) if atr[0] != '_'}
+        self._settings = _settings_cache[self._pb]
 
-        self.prodrisk_path = "C:/PRODRISK/ltm_core_bin/"
-        self.mpi_path = "C:/Program Files/Microsoft MPI/Bin"
-        self.use_coin_osi = True
+    def clear_model(self):
+        """
+            Return the session to a clean state by replacing the ProdRisk core with a new one. All objects, the
+            optimization period and n_scenarios are cleared, while the settings and keep_working_directory are kept.
+            This is cheaper than creating a new ProdriskSession, as the binding is already imported.
+        """
+        settings = {}
+        for name, datatype in get_attribute_datatypes(self._pb_api, 'setting').items():
+            value = get_attribute_value(self._pb_api, 'setting', 'setting', name, datatype)
+            if value is not None:
+                settings[name] = (datatype, value)
+
+        self._create_core()
+        for name, (datatype, value) in settings.items():
+            set_attribute(self._pb_api, 'setting', 'setting', name, datatype, value)
+
+        self._n_scenarios = 1
+        self._start_time = None
+        self._end_time = None
+        self._n_weeks = None
+        for atr_name in ['_fmt_start_time', '_fmt_end_time']:
+            self.__dict__.pop(atr_name, None)
 
     def __dir__(self):
         return [atr for atr in super().__dir__() if atr[0] != '_'] + list(self._settings.keys())
@@ -96,6 +169,23 @@ class ProdriskSession(object):
         self._pb_api.KeepWorkingDirectory(keep)
         self._keep_working_directory = keep
 
+    @property
+    def thread_safe(self):
+        return self._thread_safe
+
+    @property
+    def result_dtypes(self):
+        return self._result_dtypes
+
+    @result_dtypes.setter
+    def result_dtypes(self, dtypes):
+        # "float64" (default) or "float32", or a DtypePolicy. Used for all values read through the model and for
+        # get_results and the Arrow export
+        self._result_dtypes = get_dtype_policy(dtypes)
+        self.model.dtypes = self._result_dtypes
+        if isinstance(self._pb_api, LockedApi):
+            self._pb_api.clear_cache()
+
     @property
     def license_path(self):
         return self._license_path
@@ -142,16 +232,472 @@ class ProdriskSession(object):
             self._fmt_end_time,
         )
 
-    def run(self):
+    def ingest_scenarios(self, filename, object_type, attribute_name, columns, time_column='time',
+                         scenario_column='scenario', resolution='week', chunksize=100000, fill=False):
+        """
+            Read scenario series for many objects from a long format csv or parquet file in chunks, resample them to
+            the optimization period and set them as txy_stochastic attributes. set_optimization_period and
+            n_scenarios must be set first.
+
+            Parameters
+            ----------
+            filename: [string] csv or parquet file with a time column, a scenario column and one column per series
+            object_type: [string] type of the objects to set the series on, e.g. "inflowSeries"
+            attribute_name: [string] txy_stochastic attribute to set, e.g. "series"
+            columns: [dict or list] mapping from file column to object name, or columns named as the objects
+            resolution: [string] "week" or "hour"
+            chunksize: [integer] number of rows read at a time
+            fill: [boolean] fill time steps without data with the last value of the scenario instead of raising a
+                ValueError, see read_scenarios
+        """
+        if not isinstance(columns, dict):
+            columns = {column: column for column in columns}
+        chunks = iter_scenario_file(filename, [time_column, scenario_column] + list(columns.keys()), chunksize)
+        scenario_data = read_scenarios(chunks, self._start_time, self._n_weeks, self._n_scenarios,
+                                       time_column=time_column, scenario_column=scenario_column,
+                                       value_columns=list(columns.keys()), resolution=resolution, fill=fill)
+        for column, value in scenario_data.items():
+            set_attribute(self._pb_api, columns[column], object_type, attribute_name, 'txy_stochastic', value)
+
+    def reduce_scenarios(self, n_scenarios: int, apply: bool = True):
+        """
+            Select a representative subset of the scenarios of all stochastic inputs jointly, and optionally replace
+            the stochastic inputs and n_scenarios by the reduced set.
+
+            Parameters
+            ----------
+            n_scenarios: [integer] number of scenarios to keep
+            apply: [boolean] set the reduced scenarios on the model
+
+            Returns
+            -------
+            [dict] with the selected scenario indices ("selected"), their probabilities ("weights"), the Kantorovich
+            distance between the full and reduced set on standardized series ("distance"), and the relative error
+            in mean and standard deviation of each series with the reduced scenarios equiprobable, as they are run
+            ("moment_errors"), and with the scenario probabilities ("weighted_moment_errors")
+        """
+        reduction = reduce_scenarios(self._pb_api, self._n_scenarios, n_scenarios, apply=apply)
+        if apply:
+            self.n_scenarios = n_scenarios
+        return reduction
+
+    def execute_command_file(self, filename):
+        """
+            Parameters
+            ----------
+            filename: [string] path to a command file with "add", "set" and "run" commands
+
+            Returns
+            -------
+            [integer] number of commands executed
+        """
+        return CommandBuilder(self).execute_file(filename)
+
+    def execute_commands(self, command_string):
+        """
+            Parameters
+            ----------
+            command_string: [string] "add", "set" and "run" commands in the same format as a command file
+
+            Returns
+            -------
+            [integer] number of commands executed
+        """
+        return CommandBuilder(self).execute_string(command_string)
+
+    # run cache --------
+
+    @property
+    def run_cache(self):
+        return self._run_cache
+
+    @run_cache.setter
+    def run_cache(self, run_cache):
+        # RunCache consulted by run() before running ProdRisk, or None to disable caching
+        self._run_cache = run_cache
+
+    def get_model_hash(self):
+        # Hash of all objects, input attributes and settings, the optimization period and n_scenarios
+        state = get_model_state(self._pb_api, direction='input')
+        return get_state_hash(state, self._pb_api.GetStartTime(), self._pb_api.GetEndTime(), self._n_scenarios)
+
+    # model specification --------
+
+    def get_model_spec(self):
+        """
+            Returns
+            -------
+            [dict] plain python representation of the model (objects, input attributes, settings, optimization
+            period and n_scenarios) that can be pickled and loaded into another session with load_model_spec
+        """
+        return {
+            'state': get_model_state(self._pb_api, direction='input'),
+            'start_time': self._start_time,
+            'n_weeks': self._n_weeks,
+            'n_scenarios': self._n_scenarios,
+        }
+
+    def load_model_spec(self, spec):
+        # Build the model of a spec from get_model_spec in this session, which should have a clean model
+        if spec['start_time'] is not None:
+            self.set_optimization_period(spec['start_time'], n_weeks=spec['n_weeks'])
+        self.n_scenarios = spec['n_scenarios']
+        settings = [obj for obj in spec['state'] if obj[0] == 'setting']
+        objects = [obj for obj in spec['state'] if obj[0] != 'setting']
+        set_model_state(self._pb_api, settings, add_objects=False)
+        set_model_state(self._pb_api, objects)
+        self.model.update()
+
+    def get_results(self):
+        # Output attributes of all objects, as a model state that can be restored with load_results
+        return get_model_state(self._pb_api, direction='output', dtypes=self._result_dtypes)
+
+    def load_results(self, results):
+        set_model_state(self._pb_api, results, add_objects=False)
+
+    def diff_results(self, other, rtol=1e-9, atol=0.0):
+        """
+            Compare the results of this session with those of another session, or with results from get_results
+            (e.g. saved in a RunCache).
+
+            Parameters
+            ----------
+            other: [ProdriskSession] or results from get_results
+            rtol, atol: [float] values are equal when abs(this - other) <= atol + rtol*abs(other)
+
+            Returns
+            -------
+            [ResultDiff] with summary() per object type and attribute and iter_differences() for the details
+        """
+        return ResultDiff(self, other, rtol=rtol, atol=atol)
+
+    # parameter sweeps --------
+
+    def get_override_keys(self, overrides):
+        # Overrides with (object_type, object_name, attribute_name) keys, where settings may also be given by their
+        # session name, e.g. "max_iterations"
+        keys = {}
+        for key, value in overrides.items():
+            if isinstance(key, str):
+                if key not in self._settings:
+                    raise ValueError(f'Unknown setting: "{key}"')
+                key = ('setting', 'setting', self._settings[key])
+            keys[tuple(key)] = value
+        return keys
+
+    def apply_overrides(self, overrides):
+        """
+            Set the attributes of the overrides on the current model.
+
+            Parameters
+            ----------
+            overrides: [dict] (object_type, object_name, attribute_name) or setting name to value, e.g.
+                {('module', 'upper', 'rsvMax'): 80.0, 'max_iterations': 20}
+
+            Returns
+            -------
+            [dict] the previous values, to be passed to revert_overrides
+        """
+        return apply_overrides(self._pb_api, self.get_override_keys(overrides))
+
+    def revert_overrides(self, previous):
+        apply_overrides(self._pb_api, previous)
+
+    def sweep(self, variants, get_result=None, n_workers=1, session_factory=None):
+        """
+            Run variants of the current model. The overrides of each variant are applied before its run and reverted
+            after it, so the model is built once for all variants. With n_workers > 1, the model spec is loaded once
+            in each worker session from session_factory, and the variants are shared between the workers.
+
+            Parameters
+            ----------
+            variants: [list] or [dict] of overrides, see apply_overrides
+            get_result: [callable] called with the session after each successful run, defaults to get_results
+            n_workers: [integer] number of variants run at the same time
+            session_factory: [callable] returning a ProdriskSession with a clean model and its own session_id,
+                required when n_workers > 1
+
+            Returns
+            -------
+            [list] or [dict] with the same keys as variants, of dicts with status, result and run_time
+        """
+        return run_sweep(self, variants, get_result=get_result, n_workers=n_workers, session_factory=session_factory)
+
+    # arrow export --------
+
+    def get_arrow_table(self, object_type, attribute_name=None, direction=None):
+        """
+            Parameters
+            ----------
+            object_type: [string] object type, e.g. "module"
+            attribute_name: [string] TXY attribute to get a table with columns object_name (dictionary encoded), time
+                and scenario_<i>, or None to get a table of all scalar attributes with one row per object
+            direction: [string] "input" or "output" to only include those scalar attributes
+
+            Returns
+            -------
+            [pyarrow.Table]
+        """
+        if attribute_name is None:
+            return get_scalar_table(self._pb_api, object_type, direction)
+        return get_txy_table(self._pb_api, object_type, attribute_name, self._n_scenarios,
+                             float_dtype=self._result_dtypes.float_dtype)
+
+    def export_arrow(self, directory, direction='output', file_format='parquet'):
+        # Write one parquet ("parquet") or Arrow IPC ("ipc") file per object type and per TXY attribute, one object
+        # at a time. Returns the list of files written
+        return export_attributes(self._pb_api, directory, self._n_scenarios, direction=direction,
+                                 file_format=file_format, ignores=['setting'],
+                                 float_dtype=self._result_dtypes.float_dtype)
+
+    def validate(self):
+        """
+            Check the model before running ProdRisk: that the optimization period is set, that TXY inputs cover the
+            start of the period in whole time units with the expected number of scenarios, and that module and pump
+            topologies only refer to existing modules without forming cycles.
+
+            Returns
+            -------
+            [list] of ValidationProblem(severity, object_type, object_name, attribute_name, message)
+        """
+        return validate_model(self._pb_api, self._n_scenarios)
+
+    @property
+    def log_file(self):
+        return self._log_file
+
+    @property
+    def working_directory(self):
+        # Directory where ProdRisk writes the files of the session, used to measure the bytes written by each run. By
+        # default the directory named by the session_id under prodrisk_path
+        if self._working_directory is not None:
+            return self._working_directory
+        prodrisk_path = self.prodrisk_path.get()
+        return os.path.join(prodrisk_path, self._session_id) if prodrisk_path else None
+
+    @working_directory.setter
+    def working_directory(self, directory):
+        # Directory to measure instead of the default, or None to use the default
+        self._working_directory = directory
+
+    @property
+    def metrics_file(self):
+        return self._metrics_file
+
+    @metrics_file.setter
+    def metrics_file(self, filename):
+        # File the resource record of each run is appended to as a line of JSON, or None (default)
+        self._metrics_file = filename
+
+    @property
+    def run_resources(self):
+        """
+            Resources used by the last run, or None if the results were taken from the run cache:
+
+            started_at: start of the run, wall: total seconds
+            generate_wall, generate_cpu, generate_children_cpu: seconds used by GenerateProdriskFiles
+            optimize_wall, optimize_cpu, optimize_children_cpu: seconds used by RunProdrisk
+            peak_rss, peak_rss_children: peak memory in bytes sampled during the run, of this process and of the sum
+                over the solver/MPI processes it started, None where not available (Windows without psutil)
+            bytes_written: bytes written to working_directory, None if it was not found
+            session_id, n_scenarios, n_weeks and status of the run
+            watercourses: the records of the sub-sessions, only for run_decomposed, where the optimize phase is the
+                parallel run of all watercourses
+        """
+        return self._run_resources
+
+    @property
+    def run_summary(self):
+        # Summary of the log of the last run (iterations, convergence gaps, phase timings and stalls), or None when
+        # the session has no log_file
+        return self._run_summary
+
+    def run_rolling_horizon(self, n_steps, step_weeks=1, shift_inputs=(),
+                            start_state=('module', 'reservoir', 'startVol'), update_inputs=None, get_result=None):
+        """
+            Run the model n_steps times, moving the optimization period step_weeks forward between the runs without
+            rebuilding the model. Only the TXY inputs listed in shift_inputs are updated, and the start states are set
+            from the results of the previous run at the new start time, averaged over the scenarios.
+
+            Parameters
+            ----------
+            n_steps: [integer] number of runs
+            step_weeks: [integer] number of weeks the optimization period is moved between runs
+            shift_inputs: [list] (object_type, attribute_name) of the TXY inputs moved along with the optimization
+                period, e.g. [('area', 'price')]. Other TXY inputs are not touched, the core ignores their points before
+                the new start time
+            start_state: [tuple] (object_type, result_attribute, input_attribute) of the start states set from the
+                results of the previous run, or None to keep the start states
+            update_inputs: [callable] called with the session and the step number after the period has been moved,
+                e.g. to set new price forecasts
+            get_result: [callable] called with the session after each successful run
+
+            Returns
+            -------
+            [list] of dicts with step, start_time, update_time and run_time (seconds), status and result for each run.
+            Stops after the first failed run
+        """
+        return run_rolling_horizon(self, n_steps, step_weeks=step_weeks, shift_inputs=shift_inputs,
+                                   start_state=start_state, update_inputs=update_inputs, get_result=get_result)
+
+    def get_watercourses(self):
+        # Module names of each hydraulically independent watercourse, i.e. groups of modules not connected to other
+        # modules by waterways or pumps
+        return get_watercourses(self._pb_api)
+
+    def run_decomposed(self, session_factory, n_workers=None, validate=False, log_callback=None, stall_timeout=None):
+        """
+            Run each independent watercourse as a separate model in its own session, in parallel, and load the results
+            of the modules and pumps into this session. Shared objects, such as areas and settings, are copied to all
+            sub-models, and their results are not loaded. Models with a single watercourse are run as usual.
+
+            The run goes through the same steps as run(): the model is validated first if asked for, the run cache of
+            this session is consulted for the whole model and shared with the sub-sessions, and run_resources and
+            run_summary hold the totals of the run with the records of each watercourse under "watercourses".
+
+            Parameters
+            ----------
+            session_factory: [callable] returning a ProdriskSession with a clean model and its own session_id
+            n_workers: [integer] number of watercourses run at the same time, defaults to one per watercourse
+            validate, log_callback, stall_timeout: see run. log_callback is called from the worker threads
+
+            Returns
+            -------
+            [boolean] True if all sub-models were run successfully
+        """
+        spec = self.get_model_spec()
+        watercourses = decompose_model_state(self._pb_api, spec['state'])
+        if len(watercourses) <= 1:
+            return self.run(validate=validate, log_callback=log_callback, stall_timeout=stall_timeout)
+
+        if validate and not self._is_valid():
+            return False
+
+        cache_key = None
+        if self._run_cache is not None:
+            cache_key = self.get_model_hash()
+            outputs = self._run_cache.get(cache_key)
+            if outputs is not None:
+                self.load_results(outputs)
+                self._run_resources = None
+                return True
+
+        def run_watercourse(watercourse):
+            session = session_factory()
+            session.run_cache = self._run_cache
+            session.load_model_spec(dict(spec, state=watercourse.state))
+            status = session.run(log_callback=log_callback, stall_timeout=stall_timeout)
+            # Results at full precision, the dtypes of this session are applied when they are read
+            results = get_model_state(session._pb_api, direction='output') if status is True else None
+            return results, session.run_resources, session.run_summary
+
+        resources = ResourceMonitor(self.working_directory)
+        resources.start()
+        runs = []
+        try:
+            with resources.phase('optimize'):
+                with ThreadPoolExecutor(max_workers=n_workers or len(watercourses)) as executor:
+                    runs = list(executor.map(run_watercourse, watercourses))
+        finally:
+            resources.stop()
+            status = len(runs) == len(watercourses) and all(results is not None for results, _, _ in runs)
+            self._run_resources = resources.get_record(session_id=self._session_id, n_scenarios=self._n_scenarios,
+                                                       n_weeks=self._n_weeks, status=status,
+                                                       watercourses=[record for _, record, _ in runs])
+            self._run_summary = get_decomposed_summary([summary for _, _, summary in runs])
+            self._append_metrics()
+
+        for watercourse, (watercourse_results, _, _) in zip(watercourses, runs):
+            if watercourse_results is None:
+                print(f"The ProdRisk run of the watercourse with module(s) {', '.join(watercourse.module_names)} "
+                      f"failed. Please check the log for details.")
+                return False
+        results = merge_results(watercourses, [results for results, _, _ in runs])
+        self.load_results(results)
+        if cache_key is not None:
+            self._run_cache.put(cache_key, results)
+        return True
+
+    def _append_metrics(self):
+        # Called when a run ends, also on errors, so a failure to write the metrics file must not hide the error of
+        # the run
+        if not self._metrics_file:
+            return
+        try:
+            append_metrics(self._metrics_file, self._run_resources)
+        except OSError as e:
+            print(f"WARNING: Could not append the run resources to {self._metrics_file}: {e}")
+
+    def _is_valid(self):
+        # Validate the model, and print the errors found
+        errors = [problem for problem in self.validate() if problem.severity == 'error']
+        if errors:
+            for error in errors:
+                print(f"{error.object_type} {error.object_name} {error.attribute_name}: {error.message}")
+            print("The model is not valid, and the ProdRisk optimization/simulation was not run.")
+            return False
+        return True
+
+    def run(self, validate=False, log_callback=None, stall_timeout=None):
+        """
+            Parameters
+            ----------
+            validate: [boolean] validate the model first, and do not run ProdRisk if any errors are found
+            log_callback: [callable] called with a dict for each iteration, gap, phase timing or stall event parsed
+                from the log while ProdRisk runs. Requires that the session was created with a log_file, a ValueError
+                is raised otherwise
+            stall_timeout: [float] emit a "stall" event when nothing has been logged for this many seconds, requires a
+                log_file
+        """
+
+        if (log_callback is not None or stall_timeout is not None) and not self._log_file:
+            raise ValueError('log_callback and stall_timeout require a session created with a log_file')
+
+        if validate and not self._is_valid():
+            return False
+
+        cache_key = None
+        if self._run_cache is not None:
+            cache_key = self.get_model_hash()
+            outputs = self._run_cache.get(cache_key)
+            if outputs is not None:
+                self.load_results(outputs)
+                self._run_resources = None
+                return True
+
+        resources = ResourceMonitor(self.working_directory)
+        resources.start()
+
+        log_monitor = None
+        if self._log_file:
+            log_monitor = LogMonitor(self._log_file, callback=log_callback, stall_timeout=stall_timeout)
+            log_monitor.start()
 
         # OPTIMIZE #
         # prodr.optimize()
-        status = self._pb_api.GenerateProdriskFiles()
-        if status is True:
-            status = self._pb_api.RunProdrisk()
-            if status is False:
-                print("An error occured during the ProdRisk optimization/simulation. Please check the log for details.")
-        else:
-            print("An error occured, and the ProdRisk optimization/simulation was not run. Please check the log for details.")
+        status = None
+        try:
+            with resources.phase('generate'):
+                status = self._pb_api.GenerateProdriskFiles()
+            if status is True:
+                with resources.phase('optimize'):
+                    status = self._pb_api.RunProdrisk()
+                if status is False:
+                    print("An error occured during the ProdRisk optimization/simulation. Please check the log for details.")
+            else:
+                print("An error occured, and the ProdRisk optimization/simulation was not run. Please check the log for details.")
+        finally:
+            if log_monitor is not None:
+                log_monitor.stop()
+                self._run_summary = log_monitor.summary()
+            resources.stop()
+            self._run_resources = resources.get_record(session_id=self._session_id, n_scenarios=self._n_scenarios,
+                                                       n_weeks=self._n_weeks, status=status)
+            self._append_metrics()
+
+        if status is True and cache_key is not None:
+            # Cache entries are always stored at full precision, as they may be shared by sessions with other
+            # result dtypes
+            self._run_cache.put(cache_key, get_model_state(self._pb_api, direction='output'))
 
         return status
@@ -0,0 +1,113 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from .helpers.time import get_api_datetime, get_api_timestring, get_time_unit_ns
+
+# Rolling horizon runs, where the optimization period is moved forward between runs of the same model. Only the TXY
+# inputs given as shift_inputs are updated, by moving the start time of each series along with the period. All other
+# inputs are left as they are in the core, which ignores points before the start of the optimization period. Start
+# states, such as reservoir start volumes, are taken from the results of the previous run.
+
+
+def shift_txy_inputs(api, delta, shift_inputs):
+    """
+        Move TXY inputs by delta, keeping their values and time offsets.
+
+        Parameters
+        ----------
+        api: ProdRisk core
+        delta: [pandas.Timedelta] step the optimization period was moved
+        shift_inputs: [list] (object_type, attribute_name) of the TXY inputs to move. Other inputs are not read or set
+    """
+    shift_inputs = set(shift_inputs)
+    if not shift_inputs:
+        return
+    object_types = {object_type for object_type, _ in shift_inputs}
+    for object_name, object_type in zip(api.GetObjectNamesInSystem(), api.GetObjectTypesInSystem()):
+        if object_type not in object_types:
+            continue
+        for shift_type, attribute_name in shift_inputs:
+            if shift_type != object_type:
+                continue
+            series_start = api.GetTxySeriesStartTime(object_type, object_name, attribute_name)
+            if not series_start:
+                continue
+            t = api.GetTxySeriesT(object_type, object_name, attribute_name)
+            y = api.GetTxySeriesY(object_type, object_name, attribute_name)
+            api.SetTxySeries(object_type, object_name, attribute_name,
+                             get_api_timestring(get_api_datetime(series_start) + delta), t, y)
+
+
+def get_start_states(api, timestamp, object_type='module', result_attribute='reservoir'):
+    """
+        Mean over the scenarios of a TXY result at the timestamp, for all objects of a type with the result set.
+
+        Returns
+        -------
+        [dict] object name to value
+    """
+    unit_ns = get_time_unit_ns(api.GetTimeUnit())
+    states = {}
+    for object_name, type_in_system in zip(api.GetObjectNamesInSystem(), api.GetObjectTypesInSystem()):
+        if type_in_system != object_type:
+            continue
+        series_start = api.GetTxySeriesStartTime(object_type, object_name, result_attribute)
+        if not series_start:
+            continue
+        t = np.asarray(api.GetTxySeriesT(object_type, object_name, result_attribute), dtype=np.int64)
+        y = np.asarray(api.GetTxySeriesY(object_type, object_name, result_attribute), dtype=np.float64)
+        # Last value given at or before the timestamp
+        offset = (pd.Timestamp(timestamp).value - get_api_datetime(series_start).value) // unit_ns
+        row = np.searchsorted(t, offset, side='right') - 1
+        if row >= 0:
+            states[object_name] = float(y.reshape(t.size, -1)[row].mean())
+    return states
+
+
+def run_rolling_horizon(session, n_steps, step_weeks=1, shift_inputs=(),
+                        start_state=('module', 'reservoir', 'startVol'), update_inputs=None, get_result=None):
+    """
+        Parameters
+        ----------
+        session: [ProdriskSession] session with the model of the first step
+        n_steps: [integer] number of runs
+        step_weeks: [integer] number of weeks the optimization period is moved between runs
+        shift_inputs: [list] (object_type, attribute_name) of the TXY inputs moved along with the optimization
+            period, e.g. [('area', 'price')]. All other TXY inputs are left as they are
+        start_state: [tuple] (object_type, result_attribute, input_attribute) of the start states set from the results
+            of the previous run, or None to keep the start states
+        update_inputs: [callable] called with the session and the step number after the period has been moved, to
+            set new inputs
+        get_result: [callable] called with the session after each successful run
+
+        Returns
+        -------
+        [list] of dicts with step, start_time, update_time, run_time, status and result for each run
+    """
+    api = session._pb_api
+    delta = pd.Timedelta(weeks=step_weeks)
+    records = []
+    for step in range(n_steps):
+        start = time.perf_counter()
+        if step > 0:
+            new_start_time = session.start_time + delta
+            states = get_start_states(api, new_start_time, start_state[0], start_state[1]) if start_state else {}
+            session.set_optimization_period(new_start_time, n_weeks=session.n_weeks)
+            shift_txy_inputs(api, delta, shift_inputs)
+            for object_name, value in states.items():
+                api.SetDoubleValue(start_state[0], object_name, start_state[2], value)
+            if update_inputs is not None:
+                update_inputs(session, step)
+        update_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        status = session.run()
+        run_time = time.perf_counter() - start
+        result = get_result(session) if get_result is not None and status is True else None
+        records.append({'step': step, 'start_time': session.start_time, 'update_time': update_time,
+                        'run_time': run_time, 'status': status, 'result': result})
+        if status is not True:
+            break
+    return records
@@ -0,0 +1,122 @@
+import os
+import pickle
+import tempfile
+import threading
+
+
+class RunCache(object):
+
+    # Local on-disk cache of run results, keyed by the hash of the full model state. Entries are pickled output model
+    # states, one file per key. When the total size exceeds max_bytes, the least recently used entries are evicted.
+
+    def __init__(self, directory, max_bytes=2**30):
+        """
+            Parameters
+            ----------
+            directory: [string] cache directory, created if it does not exist
+            max_bytes: [integer] maximum total size of the cached results
+        """
+        self._directory = os.path.abspath(directory)
+        self._max_bytes = max_bytes
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        # Order of the last use of each entry in this process, which breaks ties between entries with the same
+        # modification time
+        self._n_uses = 0
+        self._last_use = {}
+        # Sessions running in parallel may share the cache, so the counters are guarded by a lock
+        self._lock = threading.Lock()
+        os.makedirs(self._directory, exist_ok=True)
+
+    @property
+    def directory(self):
+        return self._directory
+
+    @property
+    def max_bytes(self):
+        return self._max_bytes
+
+    def _get_path(self, key):
+        return os.path.join(self._directory, key + '.pkl')
+
+    def _get_entries(self):
+        # (mtime in ns, last use in this process, size, filename) of each entry, sorted from least to most recently used
+        entries = []
+        for filename in os.listdir(self._directory):
+            if filename.endswith('.pkl'):
+                try:
+                    stat = os.stat(os.path.join(self._directory, filename))
+                except OSError:  # Evicted by another process while listing
+                    continue
+                entries.append((stat.st_mtime_ns, self._last_use.get(filename, 0), stat.st_size, filename))
+        return sorted(entries)
+
+    def _use(self, key):
+        with self._lock:
+            self._n_uses += 1
+            self._last_use[key + '.pkl'] = self._n_uses
+
+    def __contains__(self, key):
+        return os.path.exists(self._get_path(key))
+
+    def get(self, key):
+        path = self._get_path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+            # Mark the entry as recently used
+            os.utime(path)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            with self._lock:
+                self._misses += 1
+            return None
+        self._use(key)
+        with self._lock:
+            self._hits += 1
+        return value
+
+    def put(self, key, value):
+        # Write to a temporary file first, so that readers never see a partially written entry. The temporary file is
+        # removed if writing fails
+        fd, tmp_path = tempfile.mkstemp(dir=self._directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._get_path(key))
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self._use(key)
+        self.evict()
+
+    def evict(self):
+        entries = self._get_entries()
+        size = sum(entry[2] for entry in entries)
+        for _, _, entry_size, filename in entries:
+            if size <= self._max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self._directory, filename))
+            except OSError:
+                continue
+            size -= entry_size
+            with self._lock:
+                self._evictions += 1
+                self._last_use.pop(filename, None)
+
+    def clear(self):
+        for _, _, _, filename in self._get_entries():
+            os.remove(os.path.join(self._directory, filename))
+
+    def stats(self):
+        entries = self._get_entries()
+        lookups = self._hits + self._misses
+        return {
+            'hits': self._hits,
+            'misses': self._misses,
+            'hit_rate': self._hits / lookups if lookups else 0.0,
+            'evictions': self._evictions,
+            'entries': len(entries),
+            'size_bytes': sum(entry[2] for entry in entries),
+        }
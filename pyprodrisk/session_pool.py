@@ -0,0 +1,146 @@
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from .prodrisk_runner import ProdriskSession
+
+
+class ProdriskSessionPool(object):
+
+    # Pool of warm ProdriskSession objects. Sessions are handed out by acquire() and cleared with clear_model() when
+    # released, so that each run only pays for building its own model, not for creating a session.
+
+    def __init__(self, max_size=4, n_warm=1, settings=None, **session_kwargs):
+        """
+            Parameters
+            ----------
+            max_size: [integer] maximum number of sessions in the pool
+            n_warm: [integer] number of sessions created up front
+            settings: [dict] settings applied to every new session, e.g. {'prodrisk_path': '/opt/ltm_core_bin/'}
+            session_kwargs: keyword arguments passed on to ProdriskSession
+        """
+        assert max_size > 0, "max_size must be positive"
+        self._max_size = max_size
+        self._settings = settings if settings else {}
+        self._session_kwargs = session_kwargs
+        # Sessions are named <session_id>_<n>, with a unique prefix by default so that pools do not share working
+        # directories
+        self._session_prefix = session_kwargs.get('session_id') or f'pool_{uuid.uuid4().hex[:8]}'
+        # Idle sessions, most recently released last. The condition guards the idle list and the counts, and is
+        # notified whenever a session or a slot for a new session becomes available
+        self._idle = []
+        self._condition = threading.Condition(threading.Lock())
+        self._n_created = 0
+        self._n_numbered = 0
+        self._n_in_use = 0
+        self._closed = False
+        for _ in range(min(n_warm, max_size)):
+            with self._condition:
+                session_number = self._reserve()
+            self._idle.append(self._create_session(session_number))
+
+    @property
+    def max_size(self):
+        return self._max_size
+
+    @property
+    def n_created(self):
+        # Number of live sessions, idle or in use
+        return self._n_created
+
+    @property
+    def n_idle(self):
+        return len(self._idle)
+
+    @property
+    def n_in_use(self):
+        return self._n_in_use
+
+    def _reserve(self):
+        # Reserve a slot for a new session, in the same critical section as the size check so that concurrent callers
+        # cannot create more than max_size sessions. The caller must hold the condition. Returns the session number,
+        # or None if the pool is full. Session numbers are never reused, so that sessions replacing discarded ones get
+        # new session ids
+        if self._n_created >= self._max_size:
+            return None
+        self._n_created += 1
+        self._n_numbered += 1
+        return self._n_numbered
+
+    def _discard(self, in_use=False):
+        # Give the slot of a session that failed or was dropped back to the pool
+        with self._condition:
+            self._n_created -= 1
+            if in_use:
+                self._n_in_use -= 1
+            self._condition.notify()
+
+    def _create_session(self, session_number):
+        kwargs = dict(self._session_kwargs, session_id=f'{self._session_prefix}_{session_number}')
+        try:
+            session = ProdriskSession(**kwargs)
+            for name, value in self._settings.items():
+                setattr(session, name, value)
+        except Exception:
+            # Give the slot back, so that a failed creation does not shrink the pool
+            self._discard()
+            raise
+        return session
+
+    def acquire(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError('The session pool is closed')
+                if self._idle:
+                    self._n_in_use += 1
+                    return self._idle.pop()
+                session_number = self._reserve()
+                if session_number is not None:
+                    self._n_in_use += 1
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f'No ProdriskSession available within {timeout} s')
+                self._condition.wait(remaining)
+        try:
+            return self._create_session(session_number)
+        except Exception:
+            with self._condition:
+                self._n_in_use -= 1
+            raise
+
+    def release(self, session):
+        try:
+            session.clear_model()
+        except Exception as e:
+            # A session that can not be cleared is dropped, and its slot is given back for a new session
+            print(f'WARNING: Dropping ProdriskSession {session.session_id} from the pool, clear_model failed: {e}')
+            self._discard(in_use=True)
+            return
+        with self._condition:
+            self._n_in_use -= 1
+            if self._closed:
+                # Sessions released after close are dropped
+                self._n_created -= 1
+            else:
+                self._idle.append(session)
+                self._condition.notify()
+
+    @contextmanager
+    def session(self, timeout=None):
+        session = self.acquire(timeout)
+        try:
+            yield session
+        finally:
+            self.release(session)
+
+    def close(self):
+        # Drop the idle sessions and wake waiting callers. Sessions in use are dropped when they are released
+        with self._condition:
+            self._closed = True
+            self._n_created -= len(self._idle)
+            self._idle = []
+            self._condition.notify_all()
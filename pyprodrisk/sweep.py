@@ -0,0 +1,85 @@
+import queue
+import threading
+import time
+
+# Parameter sweeps over variants of a base model. Each variant is a dict of overrides, applied to the base model
+# before the run and reverted after it, so the model is only built once. With several workers, each worker session
+# loads the base model spec once and then applies the overrides of the variants it runs in the same way.
+
+
+def _run_variant(session, overrides, get_result):
+    previous = session.apply_overrides(overrides)
+    try:
+        start = time.perf_counter()
+        status = session.run()
+        run_time = time.perf_counter() - start
+        result = get_result(session) if status is True else None
+    finally:
+        session.revert_overrides(previous)
+    return {'status': status, 'result': result, 'run_time': run_time}
+
+
+def _run_worker(session_factory, spec, variants, get_result, jobs, records, errors):
+    session = None
+    while True:
+        try:
+            index = jobs.get_nowait()
+        except queue.Empty:
+            return
+        try:
+            if session is None:
+                session = session_factory()
+                session.load_model_spec(spec)
+            records[index] = _run_variant(session, variants[index], get_result)
+        except Exception as e:
+            errors.append(e)
+            return
+
+
+def _get_result(session):
+    return session.get_results()
+
+
+def run_sweep(session, variants, get_result=None, n_workers=1, session_factory=None):
+    """
+        Parameters
+        ----------
+        session: [ProdriskSession] session with the base model
+        variants: [list] or [dict] of overrides, see ProdriskSession.sweep
+        get_result: [callable] called with the session after each successful run, defaults to get_results. With
+            parallel workers it is called with the session of the worker
+        n_workers: [integer] number of variants run at the same time
+        session_factory: [callable] returning a ProdriskSession with a clean model, required when n_workers > 1.
+            Each session must have its own session_id, the default session_id of ProdriskSession is unique
+
+        Returns
+        -------
+        [list] or [dict] with the same keys as variants, of dicts with status, result and run_time
+    """
+    names = list(variants.keys()) if isinstance(variants, dict) else None
+    overrides = [session.get_override_keys(variant) for variant in (variants.values() if names else variants)]
+    get_result = get_result or _get_result
+
+    if n_workers <= 1:
+        records = [_run_variant(session, variant, get_result) for variant in overrides]
+    else:
+        assert session_factory is not None, 'a session_factory is required to run variants in parallel'
+        spec = session.get_model_spec()
+        jobs = queue.Queue()
+        for index in range(len(overrides)):
+            jobs.put(index)
+        records = [None] * len(overrides)
+        errors = []
+        workers = [threading.Thread(target=_run_worker,
+                                    args=(session_factory, spec, overrides, get_result, jobs, records, errors))
+                   for _ in range(min(n_workers, len(overrides)))]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        if errors:
+            raise errors[0]
+
+    if names is not None:
+        return dict(zip(names, records))
+    return records
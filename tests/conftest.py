@@ -0,0 +1,44 @@
+import os
+
+import pytest
+
+from pyprodrisk import ProdriskSession
+
+MOCK_BIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'mock_bin')
+
+
+@pytest.fixture
+def session():
+    return ProdriskSession(solver_path=MOCK_BIN)
+
+
+def build_model(session, n_weeks=4, n_scenarios=3, modules=(('upper', 1, 2), ('lower', 2, 0))):
+    # Small system with one area, one inflow series and a cascade of modules given as (name, number, plant topology)
+    import numpy as np
+    import pandas as pd
+
+    session.set_optimization_period(pd.Timestamp('2030-01-07'), n_weeks=n_weeks)
+    session.n_scenarios = n_scenarios
+    index = pd.date_range('2030-01-07', periods=n_weeks, freq='W-MON')
+    scenario_values = np.arange(n_weeks * n_scenarios, dtype=float).reshape(n_weeks, n_scenarios)
+
+    area = session.model.area.add_object('area')
+    area.price.set(pd.DataFrame(30.0 + scenario_values, index=index))
+    inflow = session.model.inflowSeries.add_object('inflow')
+    inflow.seriesId.set(1)
+    inflow.series.set(pd.DataFrame(10.0 + scenario_values, index=index))
+    for name, number, plant_to in modules:
+        mod = session.model.module.add_object(name)
+        mod.name.set(name)
+        mod.number.set(number)
+        mod.topology.set([plant_to, 0, 0])
+        mod.rsvMax.set(100.0)
+        mod.maxProd.set(10.0)
+        mod.startVol.set(50.0)
+        mod.connectedSeriesId.set(1)
+    return session
+
+
+@pytest.fixture
+def model_session(session):
+    return build_model(session)
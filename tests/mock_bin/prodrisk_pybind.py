@@ -0,0 +1,240 @@
+import numpy as np
+import pandas as pd
+
+# In-memory stand-in for the compiled prodrisk_pybind module. ProdriskSession is pointed at this directory through
+# the solver_path argument, so the regular import path of the session is exercised by the tests.
+
+OBJECT_TYPES = {
+    'setting': [
+        ('prodriskPath', 'string', 'input'),
+        ('mpiPath', 'string', 'input'),
+        ('useCoinOsi', 'int', 'input'),
+        ('nPriceLevels', 'int', 'input'),
+        ('maxIterations', 'int', 'input'),
+        ('deficitPower', 'double', 'input'),
+    ],
+    'area': [
+        ('name', 'string', 'input'),
+        ('price', 'txy_stochastic', 'input'),
+    ],
+    'module': [
+        ('name', 'string', 'input'),
+        ('plantName', 'string', 'input'),
+        ('number', 'int', 'input'),
+        ('rsvMax', 'double', 'input'),
+        ('maxProd', 'double', 'input'),
+        ('startVol', 'double', 'input'),
+        ('topology', 'int_array', 'input'),
+        ('connectedSeriesId', 'int', 'input'),
+        ('PQcurve', 'xy', 'input'),
+        ('minVol', 'txy', 'input'),
+        ('reservoir', 'txy_stochastic', 'output'),
+        ('production', 'txy_stochastic', 'output'),
+    ],
+    'pump': [
+        ('name', 'string', 'input'),
+        ('topology', 'int_array', 'input'),
+        ('maxPumpHeight', 'double', 'input'),
+    ],
+    'inflowSeries': [
+        ('name', 'string', 'input'),
+        ('seriesId', 'int', 'input'),
+        ('series', 'txy_stochastic', 'input'),
+    ],
+}
+
+INT_INIT = -2**15 + 1
+DOUBLE_INIT = -1e38
+
+
+class ProdriskCore(object):
+    n_cores_created = 0
+
+    def __init__(self, session_id, silent=True, log_file=''):
+        ProdriskCore.n_cores_created += 1
+        self.session_id = session_id
+        self.log_file = log_file
+        self.time_unit = 'hour'
+        self.n_generate = 0
+        self.n_runs = 0
+        self.run_status = True
+        self.keep_working_directory = False
+        self._names = []
+        self._types = []
+        self._values = {}
+        self._txy = {}
+        self._start = ''
+        self._end = ''
+
+    # Type information ------
+
+    def GetObjectTypeNames(self):
+        return list(OBJECT_TYPES.keys())
+
+    def GetObjectTypeAttributeNames(self, object_type):
+        return [a[0] for a in OBJECT_TYPES[object_type]]
+
+    def GetObjectTypeAttributeDatatypes(self, object_type):
+        return [a[1] for a in OBJECT_TYPES[object_type]]
+
+    def GetValidAttributeInfoKeys(self):
+        return ['datatype', 'isInput', 'isOutput', 'description']
+
+    def GetAttributeInfo(self, object_type, attribute_name, key):
+        for name, datatype, direction in OBJECT_TYPES[object_type]:
+            if name == attribute_name:
+                return {
+                    'datatype': datatype,
+                    'isInput': str(direction == 'input'),
+                    'isOutput': str(direction == 'output'),
+                    'description': f'{object_type}.{name}',
+                }[key]
+        return ''
+
+    def GetValidObjectInfoKeys(self):
+        return ['isInput']
+
+    def GetObjectInfo(self, object_type, key):
+        return 'True'
+
+    # Objects ------
+
+    def AddObject(self, object_type, object_name):
+        self._names.append(object_name)
+        self._types.append(object_type)
+
+    def GetObjectNamesInSystem(self):
+        return list(self._names)
+
+    def GetObjectTypesInSystem(self):
+        return list(self._types)
+
+    def KeepWorkingDirectory(self, keep):
+        self.keep_working_directory = keep
+
+    # Scalar and array values ------
+
+    def _get(self, object_type, object_name, attribute_name, default):
+        return self._values.get((object_type, object_name, attribute_name), default)
+
+    def _set(self, object_type, object_name, attribute_name, value):
+        self._values[(object_type, object_name, attribute_name)] = value
+
+    def GetIntValue(self, object_type, object_name, attribute_name):
+        return self._get(object_type, object_name, attribute_name, INT_INIT)
+
+    def SetIntValue(self, object_type, object_name, attribute_name, value):
+        self._set(object_type, object_name, attribute_name, int(value))
+
+    def GetDoubleValue(self, object_type, object_name, attribute_name):
+        return self._get(object_type, object_name, attribute_name, DOUBLE_INIT)
+
+    def SetDoubleValue(self, object_type, object_name, attribute_name, value):
+        self._set(object_type, object_name, attribute_name, float(value))
+
+    def GetStringValue(self, object_type, object_name, attribute_name):
+        return self._get(object_type, object_name, attribute_name, '')
+
+    def SetStringValue(self, object_type, object_name, attribute_name, value):
+        self._set(object_type, object_name, attribute_name, str(value))
+
+    def GetIntArray(self, object_type, object_name, attribute_name):
+        return list(self._get(object_type, object_name, attribute_name, []))
+
+    def SetIntArray(self, object_type, object_name, attribute_name, value):
+        self._set(object_type, object_name, attribute_name, [int(v) for v in value])
+
+    def GetDoubleArray(self, object_type, object_name, attribute_name):
+        return list(self._get(object_type, object_name, attribute_name, []))
+
+    def SetDoubleArray(self, object_type, object_name, attribute_name, value):
+        self._set(object_type, object_name, attribute_name, [float(v) for v in value])
+
+    def GetXyCurveReference(self, object_type, object_name, attribute_name):
+        return self._get(object_type, object_name, attribute_name, (0.0, [], []))[0]
+
+    def GetXyCurveX(self, object_type, object_name, attribute_name):
+        return list(self._get(object_type, object_name, attribute_name, (0.0, [], []))[1])
+
+    def GetXyCurveY(self, object_type, object_name, attribute_name):
+        return list(self._get(object_type, object_name, attribute_name, (0.0, [], []))[2])
+
+    def SetXyCurve(self, object_type, object_name, attribute_name, ref, x, y):
+        self._set(object_type, object_name, attribute_name, (ref, list(x), list(y)))
+
+    # Time ------
+
+    def SetOptimizationPeriod(self, start, end):
+        self._start = start
+        self._end = end
+
+    def GetStartTime(self):
+        return self._start
+
+    def GetEndTime(self):
+        return self._end
+
+    def GetTimeUnit(self):
+        return self.time_unit
+
+    def GetTimeResolutionY(self):
+        return [1]
+
+    def GetTxySeriesStartTime(self, object_type, object_name, attribute_name):
+        series = self._txy.get((object_type, object_name, attribute_name))
+        return series[0] if series else ''
+
+    def GetTxySeriesT(self, object_type, object_name, attribute_name):
+        return self._txy[(object_type, object_name, attribute_name)][1].copy()
+
+    def GetTxySeriesY(self, object_type, object_name, attribute_name):
+        return self._txy[(object_type, object_name, attribute_name)][2].copy()
+
+    def SetTxySeries(self, object_type, object_name, attribute_name, start, t, y):
+        y = np.array(y, dtype=float)
+        if y.ndim == 1:
+            y = y.reshape(-1, 1)
+        self._txy[(object_type, object_name, attribute_name)] = (start, np.array(t, dtype=np.int64), y)
+
+    # Run ------
+
+    def GenerateProdriskFiles(self):
+        self.n_generate += 1
+        return bool(self._start)
+
+    def RunProdrisk(self):
+        # Produce simple deterministic results: the reservoir follows start volume plus accumulated inflow, and
+        # production is the area price scaled by the module max production.
+        self.n_runs += 1
+        unit_seconds = {'hour': 3600, 'minute': 60, 'second': 1}[self.time_unit]
+        start = pd.Timestamp(self._start)
+        n_steps = int((pd.Timestamp(self._end) - start).total_seconds() // (168 * 3600))
+        t = np.arange(n_steps, dtype=np.int64) * 168 * 3600 // unit_seconds
+        price = None
+        for key, series in self._txy.items():
+            if key[0] == 'area' and key[2] == 'price':
+                price = series[2].mean()
+        for name, object_type in zip(self._names, self._types):
+            if object_type != 'module':
+                continue
+            inflow = 0.0
+            series_id = self._get('module', name, 'connectedSeriesId', INT_INIT)
+            for s_name, s_type in zip(self._names, self._types):
+                if s_type == 'inflowSeries' and self._get(s_type, s_name, 'seriesId', INT_INIT) == series_id:
+                    key = (s_type, s_name, 'series')
+                    if key in self._txy:
+                        inflow = self._txy[key][2].mean(axis=0)
+            start_vol = max(self._get('module', name, 'startVol', 0.0), 0.0)
+            n_scen = np.size(inflow) if np.ndim(inflow) else 1
+            reservoir = start_vol + np.outer(np.arange(n_steps), np.ones(n_scen) * inflow)
+            self._txy[('module', name, 'reservoir')] = (self._start, t.copy(), reservoir)
+            max_prod = max(self._get('module', name, 'maxProd', 0.0), 0.0)
+            production = np.full((n_steps, n_scen), (price or 0.0) * max_prod)
+            self._txy[('module', name, 'production')] = (self._start, t.copy(), production)
+        if self.log_file:
+            with open(self.log_file, 'a') as f:
+                for iteration, gap in enumerate([5.0, 1.5, 0.25]):
+                    f.write(f'Iteration {iteration + 1}: convergence gap {gap} %\n')
+                f.write('Optimization time: 1.5 s\n')
+                f.write(f'Run {self.n_runs} finished\n')
+        return self.run_status
@@ -0,0 +1,62 @@
+import os
+
+import numpy as np
+import pytest
+
+pa = pytest.importorskip('pyarrow')
+
+
+def test_scalar_table(model_session):
+    table = model_session.get_arrow_table('module', direction='input')
+    assert table.column('object_name').to_pylist() == ['upper', 'lower']
+    assert table.column('number').to_pylist() == [1, 2]
+    assert table.column('rsvMax').to_pylist() == [100.0, 100.0]
+    assert table.column('plantName').to_pylist() == ['', '']
+
+
+def test_txy_table_matches_getter(model_session):
+    model_session.run()
+    table = model_session.get_arrow_table('module', 'reservoir')
+    assert table.num_columns == 2 + model_session.n_scenarios
+    assert table.schema.field('object_name').type == pa.dictionary(pa.int32(), pa.string())
+    expected = model_session.model.module.lower.reservoir.get()
+    lower = table.filter(pa.compute.equal(table.column('object_name'), 'lower'))
+    assert (lower.column('time').to_numpy() == expected.index.values).all()
+    for i in range(model_session.n_scenarios):
+        assert np.allclose(lower.column(f'scenario_{i}').to_numpy(), expected[i].values)
+
+
+def test_txy_columns_are_not_copied(model_session):
+    from pyprodrisk.prodrisk_core.arrow_export import iter_txy_batches
+
+    api = model_session._pb_api
+    y = np.asfortranarray(np.arange(12.0).reshape(4, 3))
+    api.SetTxySeries('module', 'upper', 'reservoir', '20300107000000', np.arange(4) * 168, y)
+    api.GetTxySeriesY = lambda object_type, object_name, attribute_name: y
+    batch, = iter_txy_batches(api, 'module', 'reservoir', 3, object_names=['upper'])
+    for i in range(3):
+        assert batch.column(2 + i).buffers()[1].address == y[:, i].ctypes.data
+    assert batch.column(0).to_pylist() == ['upper'] * 4
+
+    # Deterministic series share one column for all scenarios
+    y = np.arange(4.0).reshape(4, 1)
+    batch, = iter_txy_batches(api, 'module', 'reservoir', 3, object_names=['upper'])
+    assert batch.column(2).buffers()[1].address == batch.column(4).buffers()[1].address
+    assert batch.column(4).to_pylist() == [0.0, 1.0, 2.0, 3.0]
+
+
+@pytest.mark.parametrize('file_format', ['parquet', 'ipc'])
+def test_export_arrow(model_session, tmp_path, file_format):
+    model_session.run()
+    filenames = model_session.export_arrow(str(tmp_path), file_format=file_format)
+    extension = 'parquet' if file_format == 'parquet' else 'arrow'
+    assert sorted(os.path.basename(f) for f in filenames) == [f'module.production.{extension}',
+                                                               f'module.reservoir.{extension}']
+    if file_format == 'parquet':
+        import pyarrow.parquet as pq
+        table = pq.read_table(filenames[0])
+    else:
+        table = pa.ipc.open_file(filenames[0]).read_all()
+    assert table.num_rows == 2 * model_session.n_weeks
+    assert table.column('object_name').to_pylist() == ['upper'] * model_session.n_weeks + \
+        ['lower'] * model_session.n_weeks
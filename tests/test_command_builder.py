@@ -0,0 +1,40 @@
+import pandas as pd
+
+from pyprodrisk.helpers.commands import get_commands_from_file, iter_commands
+
+COMMANDS = """# Simple system
+set n_scenarios 3
+set optimization_period 2030-01-07 10
+set max_iterations 25
+set useCoinOsi 0
+add module Mod1 Mod2
+set rsvMax /module /mod1 100.5
+set rsvMax /module /MOD1 200.5
+set topology /module /mod2 0 1 0
+set PQcurve /module /mod2 0 0 0 10 20
+"""
+
+
+def test_iter_commands_matches_file_parser():
+    assert list(iter_commands(COMMANDS.splitlines())) == get_commands_from_file(COMMANDS)
+
+
+def test_execute_commands(session):
+    n_commands = session.execute_commands(COMMANDS)
+    assert n_commands == 9
+    assert session.n_scenarios == 3
+    assert session.start_time == pd.Timestamp('2030-01-07')
+    assert session.n_weeks == 10
+    assert session.max_iterations.get() == 25
+    assert session.use_coin_osi.get() == 0
+    assert session.model.module.get_object_names() == ['Mod1', 'Mod2']
+    assert session.model.module.Mod1.rsvMax.get() == 200.5
+    assert session.model.module.Mod2.topology.get() == [0, 1, 0]
+    assert (session.model.module.Mod2.PQcurve.get().values == [0, 20]).all()
+
+
+def test_execute_command_file(session, tmp_path):
+    filename = tmp_path / 'commands.txt'
+    filename.write_text(COMMANDS + 'run\n')
+    session.execute_command_file(str(filename))
+    assert session._pb_api.n_runs == 1
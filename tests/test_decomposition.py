@@ -0,0 +1,92 @@
+from pyprodrisk import ProdriskSession, RunCache
+from pyprodrisk.prodrisk_core.decomposition import decompose_model_state
+from pyprodrisk.prodrisk_core.model_state import get_model_state
+
+from .conftest import MOCK_BIN, build_model
+
+MODULES = (('a1', 1, 2), ('a2', 2, 0), ('b1', 3, 0), ('c1', 4, 5), ('c2', 5, 0))
+
+
+def test_get_watercourses(session):
+    build_model(session, modules=MODULES)
+    assert session.get_watercourses() == [['a1', 'a2'], ['b1'], ['c1', 'c2']]
+
+    pump = session.model.pump.add_object('pump')
+    pump.topology.set([1, 3, 2])
+    assert session.get_watercourses() == [['a1', 'a2', 'b1'], ['c1', 'c2']]
+
+
+def test_decompose_model_state(session):
+    build_model(session, modules=MODULES)
+    session.model.inflowSeries.add_object('unused').seriesId.set(2)
+    session.model.module['c1'].connectedSeriesId.set(2)
+    watercourses = decompose_model_state(session._pb_api, get_model_state(session._pb_api))
+
+    assert [w.module_names for w in watercourses] == [['a1', 'a2'], ['b1'], ['c1', 'c2']]
+    assert watercourses[1].owned == {('module', 'b1')}
+    objects = [[(obj[0], obj[1]) for obj in w.state] for w in watercourses]
+    assert ('area', 'area') in objects[0] and ('area', 'area') in objects[2]
+    assert ('inflowSeries', 'inflow') in objects[0] and ('inflowSeries', 'inflow') in objects[2]
+    assert ('inflowSeries', 'unused') in objects[2] and ('inflowSeries', 'unused') not in objects[0]
+    assert ('module', 'a1') not in objects[1]
+
+
+def test_decompose_unresolved_pump(session):
+    build_model(session, modules=MODULES)
+    session.model.pump.add_object('pump').topology.set([1, 8, 9])
+    watercourses = decompose_model_state(session._pb_api, get_model_state(session._pb_api))
+    objects = [[(obj[0], obj[1]) for obj in w.state] for w in watercourses]
+    assert [('pump', 'pump') in w for w in objects] == [True, False, False]
+    assert ('pump', 'pump') in watercourses[0].owned
+
+
+def test_run_decomposed(session):
+    full = build_model(ProdriskSession(solver_path=MOCK_BIN), modules=MODULES)
+    full.run()
+    build_model(session, modules=MODULES)
+    sessions = []
+
+    def session_factory():
+        new_session = ProdriskSession(solver_path=MOCK_BIN)
+        sessions.append(new_session)
+        return new_session
+
+    assert session.run_decomposed(session_factory) is True
+    assert len(sessions) == 3
+    assert session._pb_api.n_runs == 0
+    assert sorted(s.model.module.get_object_names() for s in sessions) == [['a1', 'a2'], ['b1'], ['c1', 'c2']]
+    for name, _, _ in MODULES:
+        for attribute in ['reservoir', 'production']:
+            assert session.model.module[name][attribute].get().equals(full.model.module[name][attribute].get())
+    assert session.run_resources['status'] is True
+    assert session.run_resources['optimize_wall'] >= 0.0
+    assert {r['session_id'] for r in session.run_resources['watercourses']} == {s.session_id for s in sessions}
+
+
+def test_run_decomposed_cache_and_validation(session, tmp_path):
+    build_model(session, modules=MODULES)
+    session.run_cache = RunCache(str(tmp_path))
+    sessions = []
+
+    def session_factory():
+        new_session = ProdriskSession(solver_path=MOCK_BIN)
+        sessions.append(new_session)
+        return new_session
+
+    assert session.run_decomposed(session_factory, validate=True) is True
+    assert len(sessions) == 3
+    reservoir = session.model.module['c2'].reservoir.get()
+
+    # The whole model is found in the cache, and no sub-sessions are created
+    assert session.run_decomposed(session_factory) is True
+    assert len(sessions) == 3 and session.run_resources is None
+    assert session.model.module['c2'].reservoir.get().equals(reservoir)
+
+    session.model.pump.add_object('pump').topology.set([1, 1, 8])
+    assert session.run_decomposed(session_factory, validate=True) is False
+    assert len(sessions) == 3
+
+
+def test_run_decomposed_single_watercourse(model_session):
+    assert model_session.run_decomposed(lambda: None) is True
+    assert model_session._pb_api.n_runs == 1
@@ -0,0 +1,88 @@
+import os
+import threading
+
+from pyprodrisk import ProdriskSession
+from pyprodrisk.distributed import FileBroker, run_worker
+
+from .conftest import MOCK_BIN, build_model
+
+
+def test_distributed_runs_match_local_runs(session, tmp_path):
+    broker = FileBroker(str(tmp_path))
+    job_ids = []
+    for n_scenarios in [2, 3]:
+        session.clear_model()
+        build_model(session, n_scenarios=n_scenarios)
+        job_ids.append(broker.submit(session.get_model_spec()))
+
+    workers = [threading.Thread(target=run_worker, args=(broker, lambda: ProdriskSession(solver_path=MOCK_BIN)),
+                                kwargs=dict(worker_id=f'worker{i}', poll_interval=0.01, idle_timeout=0.2))
+               for i in range(2)]
+    for worker in workers:
+        worker.start()
+    results = broker.collect(job_ids, timeout=10, poll_interval=0.01)
+    for worker in workers:
+        worker.join()
+
+    assert set(results.keys()) == set(job_ids)
+    assert session.run()
+    expected = session.model.module.upper.reservoir.get()
+    session.clear_model()
+    build_model(session, n_scenarios=3)
+    session.load_results(results[job_ids[1]]['results'])
+    assert (session.model.module.upper.reservoir.get().values == expected.values).all()
+
+
+def test_failed_jobs_are_retried(model_session, tmp_path):
+    broker = FileBroker(str(tmp_path))
+    job_id = broker.submit(model_session.get_model_spec(), max_retries=1)
+    sessions = []
+
+    def flaky_session():
+        session = ProdriskSession(solver_path=MOCK_BIN)
+        session._pb_api.run_status = len(sessions) > 0
+        sessions.append(session)
+        return session
+
+    assert run_worker(broker, flaky_session, poll_interval=0.01, max_jobs=2) == 2
+    assert broker.status(job_id) == 'done'
+    assert broker.get_result(job_id)['attempt'] == 2
+    assert len(broker.get_errors(job_id)) == 1
+
+
+def test_failed_jobs_give_up_after_retries(model_session, tmp_path):
+    broker = FileBroker(str(tmp_path))
+    job_id = broker.submit(model_session.get_model_spec(), max_retries=0)
+
+    def failing_session():
+        session = ProdriskSession(solver_path=MOCK_BIN)
+        session._pb_api.run_status = False
+        return session
+
+    assert run_worker(broker, failing_session, poll_interval=0.01, max_jobs=1) == 1
+    assert broker.status(job_id) == 'failed'
+    assert broker.collect([job_id], timeout=1) == {}
+
+
+def test_stale_jobs_are_requeued(model_session, tmp_path):
+    broker = FileBroker(str(tmp_path))
+    job_id = broker.submit(model_session.get_model_spec())
+    assert broker.claim('lost_worker')['id'] == job_id
+    assert broker.claim('other_worker') is None
+    assert broker.requeue_stale(timeout=-1) == 1
+    assert broker.status(job_id) == 'pending'
+    assert broker.claim('other_worker')['attempts'] == 2
+
+
+def test_stale_job_is_requeued_once(model_session, tmp_path):
+    broker = FileBroker(str(tmp_path))
+    other_broker = FileBroker(str(tmp_path))
+    job_id = broker.submit(model_session.get_model_spec())
+    broker.claim('lost_worker')
+    # A second collector that lost the race finds the job already moved
+    assert broker.fail(job_id, 'No heartbeat')
+    assert not other_broker.fail(job_id, 'No heartbeat')
+    assert other_broker.requeue_stale(timeout=-1) == 0
+    assert broker.status(job_id) == 'pending'
+    assert broker.get_errors(job_id) == ['No heartbeat']
+    assert sorted(os.listdir(tmp_path / 'running')) == []
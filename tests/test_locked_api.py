@@ -0,0 +1,159 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pyprodrisk import ProdriskSession
+from pyprodrisk.helpers.locks import ReadWriteLock
+from pyprodrisk.prodrisk_core.locked_api import LockedApi
+
+from .conftest import MOCK_BIN, build_model
+
+
+class CheckingApi(object):
+
+    # Wraps the mock core and records any call running at the same time as a write
+
+    def __init__(self, api):
+        self._api = api
+        self._guard = threading.Lock()
+        self._n_readers = 0
+        self._n_writers = 0
+        self.n_calls = 0
+        self.overlaps = []
+
+    def __getattr__(self, name):
+        attribute = getattr(self._api, name)
+        if not callable(attribute):
+            return attribute
+        is_read = name.startswith('Get')
+
+        def call(*args):
+            with self._guard:
+                self.n_calls += 1
+                if self._n_writers or (not is_read and self._n_readers):
+                    self.overlaps.append(name)
+                if is_read:
+                    self._n_readers += 1
+                else:
+                    self._n_writers += 1
+            try:
+                return attribute(*args)
+            finally:
+                with self._guard:
+                    if is_read:
+                        self._n_readers -= 1
+                    else:
+                        self._n_writers -= 1
+        return call
+
+
+@pytest.fixture
+def locked_session():
+    session = build_model(ProdriskSession(solver_path=MOCK_BIN, thread_safe=True))
+    session.run()
+    return session
+
+
+def test_thread_safe_session_wraps_core(locked_session):
+    assert locked_session.thread_safe
+    assert isinstance(locked_session._pb_api, LockedApi)
+    assert locked_session._pb_api.n_runs == 1
+    assert ProdriskSession(solver_path=MOCK_BIN).thread_safe is False
+
+
+def test_cached_reads_skip_core_until_write(locked_session):
+    api = locked_session._pb_api
+    checking = CheckingApi(api.core)
+    api._api = checking
+
+    module = locked_session.model.module['upper']
+    first = module.reservoir.get()
+    n_calls = checking.n_calls
+    second = module.reservoir.get()
+    assert checking.n_calls == n_calls
+    pd.testing.assert_frame_equal(first, second)
+
+    # Values from the cache are copies
+    second.iloc[0, 0] = -1.0
+    assert module.reservoir.get().iloc[0, 0] == first.iloc[0, 0]
+
+    module.startVol.set(10.0)
+    assert module.startVol.get() == 10.0
+    assert checking.n_calls > n_calls
+
+
+def test_cache_is_bounded(locked_session):
+    api = LockedApi(locked_session._pb_api.core, max_cache_entries=2)
+    for name in ['upper', 'lower', 'upper', 'lower']:
+        api.GetDoubleValue('module', name, 'rsvMax')
+    assert api.n_cached == 2
+    api.GetDoubleValue('module', 'upper', 'maxProd')
+    assert api.n_cached == 2
+    # The least recently used value was dropped
+    assert ('GetDoubleValue', 'module', 'upper', 'rsvMax') not in api._cache
+    assert ('GetDoubleValue', 'module', 'lower', 'rsvMax') in api._cache
+
+
+def test_concurrent_readers_and_writer(locked_session):
+    api = locked_session._pb_api
+    checking = CheckingApi(api.core)
+    api._api = checking
+    model = locked_session.model
+    expected = {name: model.module[name].reservoir.get() for name in ['upper', 'lower']}
+    errors = []
+
+    def read():
+        try:
+            for _ in range(200):
+                for name in ['upper', 'lower']:
+                    module = model.module[name]
+                    pd.testing.assert_frame_equal(module.reservoir.get(), expected[name])
+                    assert module.rsvMax.get() in (100.0, 200.0)
+                    assert np.isfinite(module.production.get().values).all()
+        except Exception as e:
+            errors.append(e)
+
+    def write():
+        try:
+            for i in range(200):
+                model.module['upper'].rsvMax.set(100.0 + 100.0 * (i % 2))
+                model.module['lower'].maxProd.set(10.0)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=read) for _ in range(4)] + [threading.Thread(target=write)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert not checking.overlaps
+
+
+def test_read_write_lock():
+    lock = ReadWriteLock()
+    with lock.write():
+        with lock.write():
+            with lock.read():
+                pass
+    with lock.read():
+        with lock.read():
+            with pytest.raises(RuntimeError):
+                lock.acquire_write()
+
+    # A waiting writer gets the lock before new readers
+    order = []
+    lock.acquire_read()
+    writer = threading.Thread(target=lambda: (lock.acquire_write(), order.append('write'), lock.release_write()))
+    writer.start()
+    while not lock._waiting_writers:
+        pass
+    reader = threading.Thread(target=lambda: (lock.acquire_read(), order.append('read'), lock.release_read()))
+    reader.start()
+    lock.release_read()
+    writer.join()
+    reader.join()
+    assert order == ['write', 'read']
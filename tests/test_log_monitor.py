@@ -0,0 +1,60 @@
+import pytest
+
+from pyprodrisk import ProdriskSession
+from pyprodrisk.helpers.log_monitor import LogMonitor
+
+from .conftest import MOCK_BIN, build_model
+
+
+def test_log_monitor_reads_incrementally(tmp_path):
+    log_file = tmp_path / 'prodrisk.log'
+    log_file.write_text('Iteration 99 from an earlier run\n')
+    events = []
+    now = [0.0]
+    # The monitor thread never polls within the test, the polls are driven by the test with a fake clock
+    monitor = LogMonitor(str(log_file), callback=events.append, poll_interval=3600, stall_timeout=5.0,
+                         clock=lambda: now[0])
+    monitor.start()
+    with open(log_file, 'a') as f:
+        f.write('Iteration 1: gap 10.0\nIteration 2: ga')
+        f.flush()
+        monitor.poll()
+        f.write('p 2.5\nSimulation took 3 s\n')
+        f.flush()
+    now[0] = 4.0
+    monitor.poll()
+    now[0] = 10.0
+    monitor.poll()
+    now[0] = 20.0
+    monitor.poll()
+    with open(log_file, 'a') as f:
+        f.write('Iteration 3: gap 0.5')
+    monitor.stop()
+
+    summary = monitor.summary()
+    assert summary['n_iterations'] == 3
+    assert summary['gaps'] == [10.0, 2.5, 0.5]
+    assert summary['phase_seconds'] == {'Simulation': 3.0}
+    # One stall while nothing was written from 4 to 20 seconds
+    assert summary['n_stalls'] == 1
+    stalls = [event for event in events if event['type'] == 'stall']
+    assert len(stalls) == 1 and stalls[0]['idle_seconds'] == 6.0
+
+
+def test_run_summary(tmp_path):
+    log_file = tmp_path / 'prodrisk.log'
+    session = build_model(ProdriskSession(solver_path=MOCK_BIN, log_file=str(log_file)))
+    events = []
+    assert session.run(log_callback=events.append)
+    assert session.run_summary['n_iterations'] == 3
+    assert session.run_summary['final_gap'] == 0.25
+    assert session.run_summary['phase_seconds'] == {'Optimization': 1.5}
+    assert len(events) == 7
+
+
+def test_log_callback_requires_log_file(model_session):
+    with pytest.raises(ValueError):
+        model_session.run(log_callback=print)
+    with pytest.raises(ValueError):
+        model_session.run(stall_timeout=10.0)
+    assert model_session._pb_api.n_runs == 0
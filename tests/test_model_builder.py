@@ -0,0 +1,91 @@
+import pytest
+
+from pyprodrisk.prodrisk_core.model_builder import ModelBuilderType
+
+
+class CountingApi(object):
+    # Wraps an API and counts the calls to each function
+    def __init__(self, api):
+        self._api = api
+        self.calls = {}
+
+    def __getattr__(self, name):
+        function = getattr(self._api, name)
+
+        def counted(*args):
+            self.calls[name] = self.calls.get(name, 0) + 1
+            return function(*args)
+        return counted
+
+
+def test_object_types_are_built_lazily(session):
+    for i in range(50):
+        session._pb_api.AddObject('module', f'mod{i}')
+    session._pb_api.AddObject('pump', 'pump')
+    api = CountingApi(session._pb_api)
+    model = ModelBuilderType(api, ignores=['setting'])
+    assert api.calls == {'GetObjectTypeNames': 1}
+    assert 'module' in dir(model)
+
+    assert len(model.module.get_object_names()) == 50
+    assert model.pump.get_object_names() == ['pump']
+    assert model.area.get_object_names() == []
+    assert api.calls['GetObjectNamesInSystem'] == 1
+
+    for i in range(50, 100):
+        model.module.add_object(f'mod{i}')
+    # Each add is a single core call, the objects in the system are not read again
+    assert api.calls['AddObject'] == 50
+    assert api.calls['GetObjectNamesInSystem'] == 1
+    assert api.calls['GetObjectTypesInSystem'] == 1
+    assert model.module.get_object_names()[-1] == 'mod99'
+
+    model.update()
+    assert len(model.module.get_object_names()) == 100
+    assert api.calls['GetObjectNamesInSystem'] == 2
+
+
+def test_attribute_objects_are_reused(session):
+    mod = session.model.module.add_object('mod')
+    assert session.model.module.mod is mod
+    assert mod.rsvMax is mod.rsvMax
+    assert mod['rsvMax'] is mod.rsvMax
+    mod.rsvMax.set(10.0)
+    assert mod.rsvMax.get() == 10.0
+    assert not hasattr(mod.rsvMax, '__dict__')
+    assert 'get' in dir(mod.rsvMax)
+    with pytest.raises(TypeError):
+        mod.rsvMax.get(start_time='2030-01-01', end_time='2030-01-08')
+
+
+def test_failed_object_name_read_is_retried(session):
+    session._pb_api.AddObject('module', 'mod')
+    api = CountingApi(session._pb_api)
+    model = ModelBuilderType(api, ignores=['setting'])
+    get_types = session._pb_api.GetObjectTypesInSystem
+
+    def fail():
+        raise RuntimeError('Core busy')
+
+    session._pb_api.GetObjectTypesInSystem = fail
+    try:
+        model.module
+    except RuntimeError:
+        pass
+    session._pb_api.GetObjectTypesInSystem = get_types
+    assert model.module.get_object_names() == ['mod']
+
+
+def test_rejected_object_is_not_added(session):
+    session._pb_api.AddObject = lambda object_type, object_name: False
+    with pytest.raises(AttributeError):
+        session.model.module.add_object('mod')
+    assert session.model.module.get_object_names() == []
+
+    def fail(object_type, object_name):
+        raise RuntimeError('Invalid object name')
+
+    session._pb_api.AddObject = fail
+    with pytest.raises(RuntimeError):
+        session.model.module.add_object('mod')
+    assert session.model.module.get_object_names() == []
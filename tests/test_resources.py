@@ -0,0 +1,82 @@
+import json
+import subprocess
+import sys
+
+from pyprodrisk import ProdriskSession
+from pyprodrisk.helpers.resources import ResourceMonitor, get_process_rss
+
+from .conftest import MOCK_BIN, build_model
+
+
+def test_run_resources(tmp_path):
+    log_file = tmp_path / 'prodrisk.log'
+    session = build_model(ProdriskSession(solver_path=MOCK_BIN, log_file=str(log_file)))
+    session.working_directory = str(tmp_path)
+    session.metrics_file = str(tmp_path / 'metrics' / 'runs.jsonl')
+    (tmp_path / 'metrics').mkdir()
+    assert session.run_resources is None
+
+    session.run()
+    record = session.run_resources
+    assert record['status'] is True
+    assert record['session_id'] == session.session_id
+    assert record['n_scenarios'] == 3 and record['n_weeks'] == 4
+    for phase in ['generate', 'optimize']:
+        assert record[f'{phase}_wall'] >= 0.0 and record[f'{phase}_cpu'] >= 0.0
+    assert record['wall'] >= record['generate_wall'] + record['optimize_wall']
+    # Only the log is written by the mock core
+    assert record['bytes_written'] == log_file.stat().st_size
+    if get_process_rss()[0] is not None:
+        assert record['peak_rss'] > 0
+
+    session.run()
+    lines = (tmp_path / 'metrics' / 'runs.jsonl').read_text().splitlines()
+    assert len(lines) == 2
+    assert json.loads(lines[1])['bytes_written'] == log_file.stat().st_size // 2
+
+
+def test_resource_monitor_children(tmp_path):
+    monitor = ResourceMonitor(str(tmp_path), poll_interval=0.01)
+    monitor.start()
+    with monitor.phase('child'):
+        # A child process holding 50 MB, and writing a file that is removed again before the run ends
+        subprocess.run([sys.executable, '-c', f'import os, time; b = bytearray(50 * 2**20); '
+                                              f'f = open(r"{tmp_path / "tmp.dat"}", "wb"); '
+                                              f'f.write(b"0" * 1000); f.close(); time.sleep(0.3); '
+                                              f'os.remove(r"{tmp_path / "tmp.dat"}")'], check=True)
+    monitor.stop()
+    record = monitor.get_record(status=True)
+    assert record['child_children_cpu'] > 0.0
+    assert record['bytes_written'] == 1000
+    if get_process_rss()[0] is not None:
+        assert record['peak_rss_children'] > 50 * 2**20
+        assert record['peak_rss'] > 0
+
+
+def test_default_working_directory(tmp_path):
+    # ProdRisk writes the files of a session to the directory named by the session_id under prodrisk_path
+    log_file = tmp_path / 'run_1' / 'prodrisk.log'
+    log_file.parent.mkdir()
+    session = build_model(ProdriskSession(solver_path=MOCK_BIN, log_file=str(log_file), session_id='run_1'))
+    session.prodrisk_path = str(tmp_path)
+    assert session.working_directory == str(tmp_path / 'run_1')
+    session.run()
+    assert session.run_resources['bytes_written'] == log_file.stat().st_size
+
+
+def test_no_working_directory(model_session):
+    # The default working directory under prodrisk_path does not exist with the mock core
+    model_session.run()
+    assert model_session.run_resources['bytes_written'] is None
+
+
+def test_metrics_file_error_does_not_mask_run(model_session, tmp_path, capsys):
+    model_session.metrics_file = str(tmp_path / 'missing' / 'runs.jsonl')
+    assert model_session.run() is True
+    assert 'WARNING' in capsys.readouterr().out
+    assert model_session.run_resources['n_weeks'] == 4
+
+
+def test_run_resources_without_optimization_period(session):
+    session.run()
+    assert session.run_resources['n_weeks'] is None
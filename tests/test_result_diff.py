@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+from pyprodrisk import ProdriskSession
+from pyprodrisk.prodrisk_core.result_diff import ResultDiff
+
+from .conftest import MOCK_BIN, build_model
+
+
+def _run_model(**kwargs):
+    session = build_model(ProdriskSession(solver_path=MOCK_BIN), **kwargs)
+    session.run()
+    return session
+
+
+def test_equal_results():
+    a = _run_model()
+    b = _run_model()
+    diff = a.diff_results(b)
+    assert diff.equal
+    assert diff.missing == []
+    assert list(diff.iter_differences()) == []
+    summary = diff.summary()
+    assert summary.loc[('module', 'production'), 'n_objects'] == 2
+    assert summary.loc[('module', 'production'), 'n_values'] == 2 * 4 * 3
+
+
+def test_different_results():
+    a = _run_model()
+    saved = a.get_results()
+    a.model.module['upper'].maxProd.set(11.0)
+    a.run()
+
+    diff = a.diff_results(saved)
+    assert not diff.equal
+    summary = diff.summary()
+    production = summary.loc[('module', 'production')]
+    assert production['n_different'] == 4 * 3
+    # The mock core gives production as the mean price, 35.5, times max production
+    assert np.isclose(production['max_abs_delta'], 35.5)
+    assert np.isclose(production['mean_abs_delta'], 35.5 / 2)
+    assert summary.loc[('module', 'reservoir'), 'n_different'] == 0
+
+    differences = list(diff.iter_differences())
+    assert len(differences) == 4 * 3
+    assert {d['object_name'] for d in differences} == {'upper'}
+    first = differences[0]
+    assert first['index'] == pd.Timestamp('2030-01-07') and first['column'] == 0
+    assert np.isclose(first['a'], 390.5) and np.isclose(first['b'], 355.0) and np.isclose(first['delta'], 35.5)
+
+    assert a.diff_results(saved, atol=50.0).equal
+    assert a.diff_results(saved, rtol=0.2).equal
+
+
+def test_missing_and_mismatched():
+    a = _run_model(n_weeks=4, modules=(('upper', 1, 2), ('lower', 2, 0)))
+    b = _run_model(n_weeks=5, modules=(('upper', 1, 0),))
+    diff = ResultDiff(a, b)
+    assert ('module', 'lower', 'reservoir', 'b') in diff.missing
+    assert diff.summary().loc[('module', 'reservoir'), 'n_mismatched'] == 1
+    differences = list(diff.iter_differences())
+    assert differences[0]['object_name'] == 'upper' and differences[0]['delta'] is None
+
+
+def test_comparison_is_done_once(monkeypatch):
+    a = _run_model()
+    b = _run_model()
+    diff = a.diff_results(b)
+    calls = []
+    compare_group = diff._compare_group
+    monkeypatch.setattr(diff, '_compare_group', lambda items: calls.append(1) or compare_group(items))
+    diff.summary()
+    assert diff.equal
+    list(diff.iter_differences())
+    diff.summary()
+    assert len(calls) == len(diff._groups)
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pyprodrisk import ProdriskSession
+from pyprodrisk.prodrisk_core.prodrisk_api import DtypePolicy, DEFAULT_DTYPES, FLOAT32_DTYPES, get_dtype_policy
+
+from .conftest import MOCK_BIN, build_model
+
+
+def _results_nbytes(results):
+    nbytes = 0
+    for object_type, object_name, attributes in results:
+        for datatype, value in attributes.values():
+            if isinstance(value, (pd.Series, pd.DataFrame)):
+                nbytes += value.values.nbytes
+    return nbytes
+
+
+def test_get_dtype_policy():
+    assert get_dtype_policy() is DEFAULT_DTYPES
+    assert get_dtype_policy('float64') is DEFAULT_DTYPES
+    assert get_dtype_policy('float32') is FLOAT32_DTYPES
+    policy = DtypePolicy(np.float32, np.int64, False)
+    assert get_dtype_policy(policy) is policy
+    with pytest.raises(ValueError):
+        get_dtype_policy('float16')
+
+
+def test_default_dtypes_unchanged(model_session):
+    model_session.run()
+    module = model_session.model.module['upper']
+    assert module.topology.get() == [2, 0, 0]
+    assert module.reservoir.get().values.dtype == np.float64
+
+
+def test_float32_dtypes(model_session):
+    model_session.run()
+    model_session.result_dtypes = 'float32'
+    module = model_session.model.module['upper']
+
+    topology = module.topology.get()
+    assert isinstance(topology, np.ndarray) and topology.dtype == np.int32
+    assert topology.tolist() == [2, 0, 0]
+
+    reservoir = module.reservoir.get()
+    assert reservoir.values.dtype == np.float32
+    model_session.result_dtypes = 'float64'
+    np.testing.assert_allclose(reservoir.values, module.reservoir.get().values, rtol=1e-6)
+
+    session = ProdriskSession(solver_path=MOCK_BIN, result_dtypes='float32')
+    assert session.result_dtypes is FLOAT32_DTYPES
+
+
+def test_float32_halves_result_memory():
+    # 20 modules with 10 years of weekly results for 50 scenarios
+    modules = [(f'module_{i}', i + 1, 0) for i in range(20)]
+    session = build_model(ProdriskSession(solver_path=MOCK_BIN), n_weeks=520, n_scenarios=50, modules=modules)
+    session.run()
+
+    nbytes_float64 = _results_nbytes(session.get_results())
+    session.result_dtypes = 'float32'
+    results = session.get_results()
+    nbytes_float32 = _results_nbytes(results)
+
+    assert nbytes_float64 == 20 * 2 * 520 * 50 * 8
+    assert nbytes_float32 * 2 == nbytes_float64
+
+    # Results read with float32 can be loaded back into the model
+    session.load_results(results)
+
+
+def test_float32_arrow_export(model_session):
+    pytest.importorskip('pyarrow')
+    import pyarrow as pa
+    model_session.run()
+    model_session.result_dtypes = 'float32'
+    table = model_session.get_arrow_table('module', 'reservoir')
+    assert table.schema.field('scenario_0').type == pa.float32()
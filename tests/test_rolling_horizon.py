@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+from pyprodrisk.rolling_horizon import get_start_states
+
+
+def test_rolling_horizon(model_session):
+    api = model_session._pb_api
+    n_objects = len(api.GetObjectNamesInSystem())
+    price = model_session.model.area['area'].price.get()
+    expected_start_volumes = []
+    updates = []
+
+    def get_result(session):
+        reservoir = session.model.module['upper'].reservoir.get()
+        expected_start_volumes.append(reservoir.iloc[1].mean())
+        return reservoir
+
+    inflow = model_session.model.inflowSeries['inflow'].series.get()
+    records = model_session.run_rolling_horizon(3, shift_inputs=[('area', 'price')],
+                                                update_inputs=lambda session, step: updates.append(step),
+                                                get_result=get_result)
+
+    assert [record['step'] for record in records] == [0, 1, 2]
+    assert [record['start_time'] for record in records] == list(pd.date_range('2030-01-07', periods=3, freq='W-MON'))
+    assert all(record['status'] is True and record['run_time'] >= 0.0 for record in records)
+    assert updates == [1, 2]
+    assert api.n_runs == 3
+    assert len(api.GetObjectNamesInSystem()) == n_objects
+
+    # Inputs in shift_inputs are moved along with the period, keeping their values
+    shifted_price = model_session.model.area['area'].price.get()
+    assert (shifted_price.index == price.index + pd.Timedelta(weeks=2)).all()
+    assert (shifted_price.values == price.values).all()
+
+    # Other inputs are not touched
+    assert model_session.model.inflowSeries['inflow'].series.get().equals(inflow)
+
+    # Start volumes are taken from the previous results at the new start time
+    assert np.isclose(model_session.model.module['upper'].startVol.get(), expected_start_volumes[1])
+    assert records[2]['result'].index[0] == pd.Timestamp('2030-01-21')
+
+
+def test_rolling_horizon_keep_start_states(model_session):
+    price = pd.Series([1.0, 2.0, 3.0], index=pd.DatetimeIndex(['2030-01-07', '2030-01-10', '2030-02-01']))
+    model_session.model.area['area'].price.set(price)
+    records = model_session.run_rolling_horizon(2, start_state=None)
+    assert len(records) == 2
+    assert model_session.model.module['upper'].startVol.get() == 50.0
+    # Inputs that are not shifted are left as they are
+    assert model_session.model.area['area'].price.get().equals(price)
+
+
+def test_rolling_horizon_only_touches_shifted_inputs(model_session):
+    api = model_session._pb_api
+    set_series = []
+    set_txy_series = api.SetTxySeries
+
+    def record_set(object_type, object_name, attribute_name, *args):
+        set_series.append((object_type, object_name, attribute_name))
+        return set_txy_series(object_type, object_name, attribute_name, *args)
+
+    api.SetTxySeries = record_set
+    model_session.run_rolling_horizon(3, shift_inputs=[('area', 'price')], start_state=None)
+    assert set_series == [('area', 'area', 'price')] * 2
+
+
+def test_get_start_states(model_session):
+    model_session.run()
+    reservoir = model_session.model.module['lower'].reservoir.get()
+    states = get_start_states(model_session._pb_api, pd.Timestamp('2030-01-17'))
+    assert np.isclose(states['lower'], reservoir.iloc[1].mean())
+    assert get_start_states(model_session._pb_api, pd.Timestamp('2029-01-01')) == {}
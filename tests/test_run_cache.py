@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+from pyprodrisk import ProdriskSession, RunCache
+
+from .conftest import MOCK_BIN, build_model
+
+
+def test_run_cache_hit_restores_outputs(model_session, tmp_path):
+    model_session.run_cache = RunCache(str(tmp_path))
+    assert model_session.run()
+    reservoir = model_session.model.module.upper.reservoir.get()
+    assert model_session._pb_api.n_runs == 1
+
+    model_session.clear_model()
+    build_model(model_session)
+    assert model_session.model.module.upper.reservoir.get() is None
+    assert model_session.run()
+    assert model_session._pb_api.n_runs == 0
+    assert (model_session.model.module.upper.reservoir.get().values == reservoir.values).all()
+    stats = model_session.run_cache.stats()
+    assert stats['hits'] == 1 and stats['misses'] == 1 and stats['entries'] == 1
+
+
+def test_run_cache_miss_on_changed_input(model_session, tmp_path):
+    model_session.run_cache = RunCache(str(tmp_path))
+    key = model_session.get_model_hash()
+    assert key == model_session.get_model_hash()
+    model_session.model.module.upper.rsvMax.set(101.0)
+    assert model_session.get_model_hash() != key
+    model_session.max_iterations = 3
+    assert model_session.get_model_hash() != key
+
+
+def test_run_cache_eviction(tmp_path):
+    cache = RunCache(str(tmp_path), max_bytes=2500)
+    for i in range(5):
+        cache.put(f'key{i}', b'x' * 1000)
+    stats = cache.stats()
+    assert stats['entries'] == 2
+    assert stats['evictions'] == 3
+    assert 'key4' in cache and 'key0' not in cache
+
+
+def test_run_cache_eviction_order_within_a_timestamp(tmp_path):
+    cache = RunCache(str(tmp_path), max_bytes=2500)
+    cache.put('b', b'x' * 1000)
+    cache.put('a', b'x' * 1000)
+    # Entries written within the same timestamp tick are evicted in order of use
+    for key in ['a', 'b']:
+        os.utime(tmp_path / f'{key}.pkl', ns=(10**18, 10**18))
+    cache.put('c', b'x' * 1000)
+    assert 'b' not in cache and 'a' in cache and 'c' in cache
+
+
+def test_run_cache_put_removes_temporary_file(tmp_path):
+    cache = RunCache(str(tmp_path))
+    with pytest.raises(Exception):
+        cache.put('key', lambda: None)
+    assert os.listdir(tmp_path) == []
+
+
+def test_run_cache_stores_full_precision(tmp_path):
+    cache = RunCache(str(tmp_path))
+    float32_session = build_model(ProdriskSession(solver_path=MOCK_BIN, result_dtypes='float32'))
+    float32_session.model.module.upper.startVol.set(50.123456789)
+    float32_session.run_cache = cache
+    assert float32_session.run()
+
+    session = build_model(ProdriskSession(solver_path=MOCK_BIN))
+    session.model.module.upper.startVol.set(50.123456789)
+    session.run_cache = cache
+    assert session.run()
+    assert session._pb_api.n_runs == 0
+    assert session.model.module.upper.reservoir.get().iloc[0, 0] == 50.123456789
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pyprodrisk.prodrisk_core.scenario_reduction import fast_forward_selection
+
+
+def test_fast_forward_selection_picks_cluster_representatives():
+    rng = np.random.default_rng(1)
+    centers = np.array([[0.0, 0.0], [10.0, 0.0], [0.0, 10.0]])
+    features = np.vstack([center + rng.normal(scale=0.1, size=(10, 2)) for center in centers])
+    selected, weights, distance = fast_forward_selection(features, 3)
+    assert sorted(selected // 10) == [0, 1, 2]
+    assert np.allclose(weights, 1 / 3)
+    assert distance < 0.5
+    _, _, full_distance = fast_forward_selection(features, 30)
+    assert full_distance == 0.0
+
+
+def test_reduce_scenarios(session):
+    n_weeks = 4
+    session.set_optimization_period(pd.Timestamp('2030-01-07'), n_weeks=n_weeks)
+    session.n_scenarios = 20
+    index = pd.date_range('2030-01-07', periods=n_weeks, freq='W-MON')
+    rng = np.random.default_rng(2)
+    wet = rng.random(20) > 0.5
+    for name in ['A', 'B']:
+        series = session.model.inflowSeries.add_object(name)
+        series.series.set(pd.DataFrame(np.where(wet, 100.0, 10.0) + rng.random((n_weeks, 20)), index=index))
+    area = session.model.area.add_object('area')
+    area.price.set(pd.DataFrame(np.where(wet, 20.0, 50.0) + rng.random((n_weeks, 20)), index=index))
+
+    reduction = session.reduce_scenarios(2)
+    assert session.n_scenarios == 2
+    assert set(wet[reduction['selected']]) == {True, False}
+    assert np.isclose(reduction['weights'].sum(), 1.0)
+    assert reduction['moment_errors'].shape == (3, 2)
+    assert (reduction['weighted_moment_errors']['mean_error'] < 0.05).all()
+    # The applied scenarios are equiprobable, so their errors use equal weights
+    if not np.isclose(wet.mean(), 0.5):
+        assert (reduction['moment_errors']['mean_error'] > reduction['weighted_moment_errors']['mean_error']).all()
+    assert session.model.inflowSeries.A.series.get().shape == (n_weeks, 2)
+
+
+def test_reduce_scenarios_mismatched_columns(session):
+    session.set_optimization_period(pd.Timestamp('2030-01-07'), n_weeks=2)
+    session.n_scenarios = 4
+    index = pd.date_range('2030-01-07', periods=2, freq='W-MON')
+    session.model.inflowSeries.add_object('A').series.set(pd.DataFrame(np.ones((2, 4)), index=index))
+    session.model.inflowSeries.add_object('B').series.set(pd.DataFrame(np.ones((2, 3)), index=index))
+    with pytest.raises(ValueError, match='inflowSeries B series has 3 scenarios'):
+        session.reduce_scenarios(2)
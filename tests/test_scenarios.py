@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pyprodrisk.helpers.scenarios import iter_scenario_file, read_scenarios
+
+
+def _write_scenario_file(filename, n_years=4, n_weeks=3):
+    frames = []
+    for year in range(2000, 2000 + n_years):
+        time = pd.date_range(f'{year}-01-03', periods=n_weeks * 168, freq='h')
+        frames.append(pd.DataFrame({
+            'time': time,
+            'scenario': year,
+            'river_a': np.arange(time.size) + year,
+            'river_b': np.full(time.size, float(year)),
+        }))
+    df = pd.concat(frames)
+    df.to_csv(filename, index=False)
+    return df
+
+
+def test_read_scenarios_in_chunks(tmp_path):
+    filename = tmp_path / 'inflow.csv'
+    df = _write_scenario_file(filename)
+    start_time = pd.Timestamp('2030-01-07')
+    chunks = iter_scenario_file(str(filename), ['time', 'scenario', 'river_a', 'river_b'], chunksize=500)
+    scenario_data = read_scenarios(chunks, start_time, n_weeks=2, n_scenarios=3)
+
+    river_a = scenario_data['river_a']
+    assert river_a.shape == (2, 3)
+    assert river_a.index[0] == start_time
+    for i, year in enumerate([2000, 2001, 2002]):
+        expected = df[df.scenario == year].river_a.to_numpy()[:336].reshape(2, 168).mean(axis=1)
+        assert np.allclose(river_a[i].values, expected)
+    assert (scenario_data['river_b'].values == [[2000, 2001, 2002]] * 2).all()
+
+
+def test_read_scenarios_too_few_scenarios(tmp_path):
+    filename = tmp_path / 'inflow.csv'
+    _write_scenario_file(filename, n_years=2)
+    chunks = iter_scenario_file(str(filename), ['time', 'scenario', 'river_a'])
+    with pytest.raises(ValueError):
+        read_scenarios(chunks, pd.Timestamp('2030-01-07'), n_weeks=2, n_scenarios=3)
+
+
+def test_read_scenarios_missing_steps():
+    start_time = pd.Timestamp('2030-01-07')
+    # Scenario 2001 has no data in the second week, and scenario 2002 ends after the first week
+    df = pd.DataFrame({
+        'time': pd.to_datetime(['2000-01-03', '2000-01-10', '2000-01-17', '2001-01-03', '2001-01-17', '2002-01-03']),
+        'scenario': [2000, 2000, 2000, 2001, 2001, 2002],
+        'inflow': [1.0, 2.0, 3.0, 4.0, 6.0, 7.0],
+    })
+    with pytest.raises(ValueError, match=r'missing 3 time steps: 2030-01-14 00:00:00 \(scenario 2001\), '
+                                         r'2030-01-14 00:00:00 \(scenario 2002\), 2030-01-21 00:00:00 '
+                                         r'\(scenario 2002\)'):
+        read_scenarios([df], start_time, n_weeks=3, n_scenarios=3)
+
+    inflow = read_scenarios([df], start_time, n_weeks=3, n_scenarios=3, fill=True)['inflow']
+    assert (inflow.values == [[1.0, 4.0, 7.0], [2.0, 4.0, 7.0], [3.0, 6.0, 7.0]]).all()
+
+
+def test_ingest_scenarios(session, tmp_path):
+    filename = tmp_path / 'inflow.csv'
+    _write_scenario_file(filename)
+    session.set_optimization_period(pd.Timestamp('2030-01-07'), n_weeks=3)
+    session.n_scenarios = 4
+    session.model.inflowSeries.add_object('A')
+    session.model.inflowSeries.add_object('B')
+    session.ingest_scenarios(str(filename), 'inflowSeries', 'series', {'river_a': 'A', 'river_b': 'B'},
+                             resolution='hour', chunksize=1000)
+    series = session.model.inflowSeries.B.series.get()
+    assert series.shape == (3 * 168, 4)
+    assert (series.iloc[0].values == [2000, 2001, 2002, 2003]).all()
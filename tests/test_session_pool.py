@@ -0,0 +1,138 @@
+import sys
+import threading
+
+import pandas as pd
+import pytest
+
+from pyprodrisk import ProdriskSession, ProdriskSessionPool
+
+from .conftest import MOCK_BIN
+
+
+def test_sys_path_is_not_extended_per_session():
+    ProdriskSession(solver_path=MOCK_BIN)
+    n_paths = len(sys.path)
+    ProdriskSession(solver_path=MOCK_BIN)
+    assert len(sys.path) == n_paths
+
+
+def test_default_session_ids_are_unique():
+    ids = {ProdriskSession(solver_path=MOCK_BIN).session_id for _ in range(5)}
+    assert len(ids) == 5
+
+
+def test_clear_model(session):
+    session.n_scenarios = 5
+    session.max_iterations = 10
+    session.set_optimization_period(pd.Timestamp('2030-01-07'), n_weeks=4)
+    session.model.module.add_object('mod')
+    session.clear_model()
+    assert session.model.module.get_object_names() == []
+    assert session.n_scenarios == 1
+    assert session.start_time is None
+    assert session.max_iterations.get() == 10
+    assert session.prodrisk_path.get() == "C:/PRODRISK/ltm_core_bin/"
+
+
+def test_pool_reuses_sessions():
+    pool = ProdriskSessionPool(max_size=2, n_warm=1, settings={'prodrisk_path': '/opt/prodrisk/'},
+                               solver_path=MOCK_BIN)
+    assert pool.n_created == 1
+    with pool.session() as session:
+        first_id = session.session_id
+        assert session.prodrisk_path.get() == '/opt/prodrisk/'
+        session.model.module.add_object('mod')
+    with pool.session() as session:
+        assert session.session_id == first_id
+        assert session.model.module.get_object_names() == []
+    assert pool.n_created == 1
+
+
+def test_pool_blocks_when_exhausted():
+    pool = ProdriskSessionPool(max_size=1, n_warm=0, solver_path=MOCK_BIN)
+    session = pool.acquire()
+    with pytest.raises(TimeoutError):
+        pool.acquire(timeout=0.01)
+
+    acquired = []
+    thread = threading.Thread(target=lambda: acquired.append(pool.acquire(timeout=5)))
+    thread.start()
+    pool.release(session)
+    thread.join()
+    assert acquired == [session]
+    assert pool.n_created == 1
+
+
+def test_pool_session_ids_are_unique():
+    ids = set()
+    for _ in range(2):
+        pool = ProdriskSessionPool(max_size=2, n_warm=2, solver_path=MOCK_BIN)
+        ids |= {pool.acquire().session_id for _ in range(2)}
+    assert len(ids) == 4
+    pool = ProdriskSessionPool(max_size=1, n_warm=1, solver_path=MOCK_BIN, session_id='worker')
+    assert pool.acquire().session_id == 'worker_1'
+
+
+def test_pool_does_not_exceed_max_size():
+    pool = ProdriskSessionPool(max_size=2, n_warm=0, solver_path=MOCK_BIN)
+    barrier = threading.Barrier(6)
+    acquired = []
+    errors = []
+
+    def acquire():
+        barrier.wait()
+        try:
+            acquired.append(pool.acquire(timeout=0.2))
+        except TimeoutError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=acquire) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert pool.n_created == 2
+    assert len(acquired) == 2 and len(errors) == 4
+
+
+def test_pool_releases_slot_when_creation_fails(monkeypatch):
+    pool = ProdriskSessionPool(max_size=1, n_warm=0, solver_path=MOCK_BIN)
+
+    def fail(**kwargs):
+        raise RuntimeError('No license')
+
+    with monkeypatch.context() as m:
+        m.setattr('pyprodrisk.session_pool.ProdriskSession', fail)
+        with pytest.raises(RuntimeError):
+            pool.acquire()
+    assert pool.n_created == 0
+    assert pool.acquire() is not None
+    assert pool.n_created == 1
+
+
+def test_pool_drops_sessions_that_fail_to_clear():
+    pool = ProdriskSessionPool(max_size=1, n_warm=0, solver_path=MOCK_BIN)
+    session = pool.acquire()
+    first_id = session.session_id
+
+    def fail():
+        raise RuntimeError('Core crashed')
+
+    session.clear_model = fail
+    pool.release(session)
+    assert pool.n_created == 0 and pool.n_in_use == 0
+    # The slot is given to a new session with a new session id
+    new_session = pool.acquire(timeout=1)
+    assert new_session is not session and new_session.session_id != first_id
+    assert pool.n_created == 1
+
+
+def test_pool_close_accounts_for_sessions_in_use():
+    pool = ProdriskSessionPool(max_size=2, n_warm=2, solver_path=MOCK_BIN)
+    session = pool.acquire()
+    pool.close()
+    assert pool.n_created == 1 and pool.n_in_use == 1
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+    pool.release(session)
+    assert pool.n_created == 0 and pool.n_in_use == 0 and pool.n_idle == 0
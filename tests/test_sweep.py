@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from pyprodrisk import ProdriskSession
+
+from .conftest import MOCK_BIN
+
+
+def _production(results, module_name):
+    for object_type, object_name, attributes in results:
+        if object_type == 'module' and object_name == module_name:
+            return attributes['production'][1]
+
+
+def test_overrides_are_reverted(model_session):
+    model_session.max_iterations = 10
+    base_hash = model_session.get_model_hash()
+
+    previous = model_session.apply_overrides({('module', 'upper', 'maxProd'): 20.0, 'max_iterations': 50})
+    assert model_session.model.module['upper'].maxProd.get() == 20.0
+    assert model_session.max_iterations.get() == 50
+    assert model_session.get_model_hash() != base_hash
+
+    model_session.revert_overrides(previous)
+    assert model_session.model.module['upper'].maxProd.get() == 10.0
+    assert model_session.get_model_hash() == base_hash
+
+
+def test_override_of_unset_attribute(model_session):
+    with pytest.raises(ValueError):
+        model_session.apply_overrides({'max_iterations': 50})
+    with pytest.raises(ValueError):
+        model_session.apply_overrides({'no_such_setting': 1})
+
+
+def test_sweep(model_session):
+    base_hash = model_session.get_model_hash()
+    n_runs = model_session._pb_api.n_runs
+    variants = {max_prod: {('module', 'upper', 'maxProd'): max_prod} for max_prod in [5.0, 10.0, 20.0]}
+
+    records = model_session.sweep(variants)
+    assert list(records.keys()) == [5.0, 10.0, 20.0]
+    assert model_session._pb_api.n_runs == n_runs + 3
+    assert model_session.get_model_hash() == base_hash
+
+    base = _production(records[10.0]['result'], 'upper').values
+    for max_prod, record in records.items():
+        assert record['status'] is True
+        np.testing.assert_allclose(_production(record['result'], 'upper').values, base * max_prod / 10.0)
+        np.testing.assert_allclose(_production(record['result'], 'lower').values,
+                                   _production(records[10.0]['result'], 'lower').values)
+
+
+def test_parallel_sweep(model_session):
+    variants = [{('module', 'lower', 'startVol'): start_vol} for start_vol in [0.0, 25.0, 50.0, 75.0]]
+    sequential = model_session.sweep(variants, get_result=lambda s: s.model.module['lower'].reservoir.get())
+
+    sessions = []
+
+    def session_factory():
+        new_session = ProdriskSession(solver_path=MOCK_BIN)
+        sessions.append(new_session)
+        return new_session
+
+    parallel = model_session.sweep(variants, get_result=lambda s: s.model.module['lower'].reservoir.get(),
+                                   n_workers=2, session_factory=session_factory)
+    # A worker only creates its session when there is a variant left for it
+    assert 1 <= len(sessions) <= 2
+    assert len({session.session_id for session in sessions}) == len(sessions)
+    assert sum(session._pb_api.n_runs for session in sessions) == 4
+    for a, b in zip(sequential, parallel):
+        assert a['result'].equals(b['result'])
+    assert parallel[1]['result'].iloc[0, 0] == 25.0
+
+
+def test_failed_override_is_rolled_back(model_session):
+    model_session.max_iterations = 10
+    base_hash = model_session.get_model_hash()
+    with pytest.raises(Exception):
+        model_session.apply_overrides({('module', 'upper', 'maxProd'): 20.0, 'max_iterations': 'fifty'})
+    assert model_session.model.module['upper'].maxProd.get() == 10.0
+    assert model_session.get_model_hash() == base_hash
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pyprodrisk.helpers.time import get_api_datetime, get_api_datetimes, get_api_timestring, get_api_timestrings, \
+    get_datetimes_from_offsets, get_offsets_from_datetimes
+
+
+def test_get_api_datetimes_matches_scalar():
+    time_strings = ['20220101', '2022010112', '202201011230', '20220101123045', '2022010112304599']
+    expected = [get_api_datetime(time_string) for time_string in time_strings]
+    assert (get_api_datetimes(time_strings) == pd.DatetimeIndex(expected)).all()
+
+
+def test_get_api_timestrings_matches_scalar():
+    timestamps = pd.date_range('2021-12-31 22:00', periods=100, freq='37min')
+    expected = [get_api_timestring(timestamp) for timestamp in timestamps]
+    assert list(get_api_timestrings(timestamps)) == expected
+    assert (get_api_datetimes(get_api_timestrings(timestamps)) == timestamps).all()
+
+
+def test_offsets_round_trip():
+    start = pd.Timestamp('2022-01-01')
+    offsets = np.array([0, 1, 5, 168, 8760])
+    timestamps = get_datetimes_from_offsets(start, offsets, 'hour')
+    assert timestamps[3] == pd.Timestamp('2022-01-08')
+    assert (get_offsets_from_datetimes(start, timestamps, 'hour') == offsets).all()
+
+
+def test_offsets_reject_partial_units():
+    with pytest.raises(ValueError):
+        get_offsets_from_datetimes(pd.Timestamp('2022-01-01'), [pd.Timestamp('2022-01-01 00:30')], 'hour')
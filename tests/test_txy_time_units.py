@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from .conftest import build_model
+
+UNIT_SECONDS = {'hour': 3600, 'minute': 60, 'second': 1}
+
+
+@pytest.mark.parametrize('time_unit, freq', [('hour', '1h'), ('minute', '15min'), ('second', '30s')])
+def test_txy_round_trip(session, time_unit, freq):
+    session._pb_api.time_unit = time_unit
+    session.set_optimization_period(pd.Timestamp('2030-01-07'), n_weeks=1)
+    session.n_scenarios = 2
+    index = pd.date_range('2030-01-07', periods=1000, freq=freq)
+    price = pd.DataFrame(np.arange(2000, dtype=float).reshape(1000, 2), index=index)
+
+    area = session.model.area.add_object('area')
+    area.price.set(price)
+    t = session._pb_api.GetTxySeriesT('area', 'area', 'price')
+    step = int(pd.Timedelta(freq).total_seconds()) // UNIT_SECONDS[time_unit]
+    assert (t == np.arange(1000) * step).all()
+
+    value = area.price.get()
+    assert (value.index == index).all()
+    assert (value.values == price.values).all()
+
+    module = session.model.module.add_object('module')
+    min_vol = pd.Series([1.0, 2.0], index=index[[0, 10]])
+    module.minVol.set(min_vol)
+    assert (module.minVol.get() == min_vol).all()
+
+
+@pytest.mark.parametrize('time_unit, offset', [('hour', '30min'), ('minute', '30s'), ('second', '500ms')])
+def test_txy_partial_time_unit(session, time_unit, offset):
+    session._pb_api.time_unit = time_unit
+    session.set_optimization_period(pd.Timestamp('2030-01-07'), n_weeks=1)
+    area = session.model.area.add_object('area')
+    index = pd.DatetimeIndex([pd.Timestamp('2030-01-07'), pd.Timestamp('2030-01-07') + pd.Timedelta(offset)])
+    with pytest.raises(ValueError):
+        area.price.set(pd.Series([1.0, 2.0], index=index))
+
+
+@pytest.mark.parametrize('time_unit', ['hour', 'minute', 'second'])
+def test_results_in_time_unit(session, time_unit):
+    session._pb_api.time_unit = time_unit
+    build_model(session)
+    assert session.validate() == []
+    session.run()
+    reservoir = session.model.module['upper'].reservoir.get()
+    assert (reservoir.index == pd.date_range('2030-01-07', periods=4, freq='W-MON')).all()
+
+
+class XytApi(object):
+
+    # Minimal core with one XyT curve of two time steps, as the mock core has no XyT support
+
+    def __init__(self, time_unit):
+        self.time_unit = time_unit
+
+    def GetTimeUnit(self):
+        return self.time_unit
+
+    def GetTimeResolutionY(self):
+        return [1]
+
+    def GetStartTime(self):
+        return '20300107000000'
+
+    def GetEndTime(self):
+        return '20300107000300'
+
+    def GetXyTCurveTimes(self, object_type, object_name, attribute_name):
+        return [0, 1]
+
+    def GetXyTCurveX(self, object_type, object_name, attribute_name, start, end):
+        return [0.0, 1.0, 0.0, 2.0]
+
+    def GetXyTCurveY(self, object_type, object_name, attribute_name, start, end):
+        return [10.0, 11.0, 20.0, 22.0]
+
+    def GetXyTCurveN(self, object_type, object_name, attribute_name, start, end):
+        return [2, 2]
+
+
+@pytest.mark.parametrize('time_unit, step', [('minute', pd.Timedelta(minutes=1)), ('week', pd.Timedelta(minutes=1)),
+                                             ('second', pd.Timedelta(seconds=1))])
+def test_xyt_time_units(time_unit, step, capsys):
+    from pyprodrisk.prodrisk_core.prodrisk_api import get_xyt_attribute
+
+    start = pd.Timestamp('2030-01-07')
+    value = get_xyt_attribute(XytApi(time_unit), 'module', 'module', 'curve', start, start + pd.Timedelta(hours=1))
+    # Time units other than hour and second are taken to be minutes
+    assert [curve.name for curve in value] == [start, start + step]
+    assert list(value[1].index) == [0.0, 2.0] and list(value[1].values) == [20.0, 22.0]
+    assert ('WARNING' in capsys.readouterr().out) == (time_unit == 'second')
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+from .conftest import build_model
+
+
+def _messages(problems):
+    return {(p.object_name, p.attribute_name): p.message for p in problems}
+
+
+def test_valid_model(model_session):
+    assert model_session.validate() == []
+    assert model_session.run(validate=True)
+
+
+def test_missing_optimization_period(session):
+    problems = session.validate()
+    assert len(problems) == 1
+    assert problems[0].severity == 'error'
+
+
+def test_txy_problems(model_session):
+    index = pd.date_range('2030-01-14', periods=3, freq='W-MON')
+    model_session.model.area.area.price.set(pd.DataFrame(np.ones((3, 3)), index=index))
+    model_session.model.inflowSeries.inflow.series.set(
+        pd.DataFrame(np.ones((3, 2)), index=index - pd.Timedelta(weeks=1)))
+    messages = _messages(model_session.validate())
+    assert 'does not cover' in messages[('area', 'price')]
+    assert 'has 2 scenarios' in messages[('inflow', 'series')]
+
+
+def test_txy_series_start_off_the_hour(session):
+    session._pb_api.time_unit = 'minute'
+    model_session = build_model(session)
+    index = pd.DatetimeIndex(['2030-01-06 23:30', '2030-01-07 00:30'])
+    model_session.model.area.area.price.set(pd.DataFrame(np.ones((2, 3)), index=index))
+    messages = _messages(model_session.validate())
+    assert 'whole hours' in messages[('area', 'price')]
+
+
+def test_txy_series_step_off_the_hour(session):
+    session._pb_api.time_unit = 'minute'
+    model_session = build_model(session)
+    index = pd.DatetimeIndex(['2030-01-07 00:00', '2030-01-07 00:30', '2030-01-07 02:00'])
+    model_session.model.area.area.price.set(pd.DataFrame(np.ones((3, 3)), index=index))
+    messages = _messages(model_session.validate())
+    assert 'whole hours' in messages[('area', 'price')]
+    assert ('inflow', 'series') not in messages
+
+
+def test_topology_problems(session):
+    build_model(session, modules=(('a', 1, 2), ('b', 2, 3), ('c', 3, 2), ('d', 4, 9)))
+    pump = session.model.pump.add_object('pump')
+    pump.topology.set([1, 1, 8])
+    messages = _messages(session.validate())
+    assert 'module number 9' in messages[('d', 'topology')]
+    assert 'module number 8' in messages[('pump', 'topology')]
+    assert 'cycle' in messages[('b', 'topology')]
+    assert 'cycle' in messages[('c', 'topology')]
+    assert ('a', 'topology') not in messages
+    assert not session.run(validate=True)
+    assert session._pb_api.n_generate == 0